@@ -1,13 +1,65 @@
 import os
 from celery import Celery
+from celery.schedules import crontab
+from kombu import Queue
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Backend.settings')
 
 app = Celery('Backend')
 app.conf.broker_url = os.environ.get('CELERY_BROKER_URL', 'redis://redis:6379/0')
 app.conf.result_backend = os.environ.get('CELERY_RESULT_BACKEND', 'redis://redis:6379/1')
-app.autodiscover_tasks()
-
-
-
 
+# Queue topology. Checkout follow-ups (payments, cart flushes) stay on `default`
+# so they never wait behind a batch of emails or a rollup; run one worker per
+# group, e.g. `celery -A Backend worker -Q default` and
+# `celery -A Backend worker -Q email,analytics,maintenance`.
+app.conf.task_default_queue = 'default'
+app.conf.task_queues = (
+    Queue('default'),
+    Queue('email'),
+    Queue('analytics'),
+    Queue('maintenance'),
+)
+app.conf.task_routes = {
+    'api.tasks.send_order_confirmations': {'queue': 'email'},
+    'api.tasks.send_order_confirmation_email': {'queue': 'email'},
+    'api.tasks.refresh_sales_rollups': {'queue': 'analytics'},
+    'api.tasks.flush_dirty_carts': {'queue': 'maintenance'},
+    'api.tasks.purge_idempotency_keys': {'queue': 'maintenance'},
+    'api.tasks.publish_outbox': {'queue': 'maintenance'},
+    'api.tasks.reap_pending_orders': {'queue': 'maintenance'},
+}
+# Every task reports through the database (order status, sent_at, rollups), so
+# nothing reads task results; don't write them to the result backend.
+app.conf.task_ignore_result = True
+# Long tasks ack late (see api.tasks), so a worker must not hold more unacked
+# messages than it has processes: one slow batch would strand the rest.
+app.conf.worker_prefetch_multiplier = 1
+app.conf.beat_schedule = {
+    # Fallback for when no dispatch_outbox process is running.
+    'publish-outbox': {
+        'task': 'api.tasks.publish_outbox',
+        'schedule': 10.0,
+    },
+    'refresh-sales-rollups': {
+        'task': 'api.tasks.refresh_sales_rollups',
+        'schedule': crontab(minute='*/5'),
+    },
+    'send-order-confirmations': {
+        'task': 'api.tasks.send_order_confirmations',
+        'schedule': crontab(),
+    },
+    'flush-dirty-carts': {
+        'task': 'api.tasks.flush_dirty_carts',
+        'schedule': crontab(minute='*/10'),
+    },
+    'purge-idempotency-keys': {
+        'task': 'api.tasks.purge_idempotency_keys',
+        'schedule': crontab(minute=0),
+    },
+    'reap-pending-orders': {
+        'task': 'api.tasks.reap_pending_orders',
+        'schedule': crontab(minute='*/5'),
+    },
+}
+app.autodiscover_tasks()
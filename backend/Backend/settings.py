@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+from decimal import Decimal
 from pathlib import Path
 import os
 
@@ -152,12 +153,89 @@ STATICFILES_DIRS = [
 # REST Framework / Auth
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
+    # Reverse proxies in front of the app. Throttles take the client IP from that many
+    # hops into X-Forwarded-For; with 0 they use REMOTE_ADDR and ignore the header.
+    # Anonymous requests are throttled per IP, so behind a proxy set this, or every
+    # anonymous client shares the proxy's bucket.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '0')),
+    # Token buckets for the CPU-heavy endpoints (api.throttling.TokenBucketThrottle):
+    # "<burst>/<period>" allows that many requests at once, refilled evenly over the period.
+    'DEFAULT_THROTTLE_RATES': {
+        'register': os.environ.get('THROTTLE_REGISTER', '5/min'),
+        'jwt': os.environ.get('THROTTLE_JWT', '10/min'),
+        'checkout': os.environ.get('THROTTLE_CHECKOUT', '30/min'),
+    },
 }
+# Where throttle buckets live: "redis" shares them across web processes; "locmem"
+# keeps them per process, for tests and local runs.
+THROTTLE_STORE = os.environ.get('THROTTLE_STORE', 'locmem')
+THROTTLE_REDIS_URL = os.environ.get('THROTTLE_REDIS_URL', 'redis://redis:6379/4')
+
+# Cache
+# Redis (the instance docker-compose already runs for Celery) when CACHE_URL is set;
+# otherwise a process-local memory cache, which is what tests run against.
+CACHE_URL = os.environ.get('CACHE_URL', '')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+            'KEY_PREFIX': 'skmart',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Catalog
+# Seconds a rendered product/category read stays in the response cache; 0 disables it.
+CATALOG_CACHE_TIMEOUT = int(os.environ.get('CATALOG_CACHE_TIMEOUT', '300'))
+# Upper bounds of the price bands used by catalog facets; the last band is open-ended.
+# Run `manage.py rebuild_facets` after changing them.
+CATALOG_PRICE_BANDS = [
+    Decimal(b.strip()) for b in os.environ.get('CATALOG_PRICE_BANDS', '25,50,100,250,500').split(',') if b.strip()
+]
+
+# Carts
+# 'database' keeps carts in Cart/CartItem; 'redis' serves them from Redis hashes and
+# writes them back to the database CART_FLUSH_DELAY seconds after a change.
+CART_STORE = os.environ.get('CART_STORE', 'database')
+CART_REDIS_URL = os.environ.get('CART_REDIS_URL', 'redis://redis:6379/3')
+CART_REDIS_TTL = int(os.environ.get('CART_REDIS_TTL', str(7 * 24 * 3600)))
+CART_FLUSH_DELAY = int(os.environ.get('CART_FLUSH_DELAY', '30'))
+
+# Idempotency-Key responses for POST /api/orders/ are replayed for this long.
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', str(24 * 3600)))
+# A key whose request is still running is held this long; a retry after that takes
+# it over, so a request that crashed mid-way does not block its key for the full TTL.
+IDEMPOTENCY_CLAIM_TIMEOUT = int(os.environ.get('IDEMPOTENCY_CLAIM_TIMEOUT', '60'))
+
+# Payments. Checkout charges through this provider, in the request or, with
+# `Prefer: respond-async`, in the process_order_payment task.
+PAYMENT_PROVIDER = os.environ.get('PAYMENT_PROVIDER', 'stub')
+PAYMENT_STUB_LATENCY = float(os.environ.get('PAYMENT_STUB_LATENCY', '0'))
+# Seconds a worker's lease on an order lasts while it charges it.
+PAYMENT_CLAIM_TIMEOUT = int(os.environ.get('PAYMENT_CLAIM_TIMEOUT', '120'))
+# Orders still pending this many seconds after their last change, with no live
+# lease, are queued for payment again by the reap_pending_orders task.
+PAYMENT_PENDING_TIMEOUT = int(os.environ.get('PAYMENT_PENDING_TIMEOUT', '900'))
+
+# Sales rollups (api.rollups) only consume orders last changed at least this
+# many seconds ago, so slow transactions commit before the watermark passes them.
+SALES_ROLLUP_LAG = int(os.environ.get('SALES_ROLLUP_LAG', '120'))
+
+# Admin dashboard headline numbers (/api/analytics/dashboard/) are recomputed at
+# most once per DASHBOARD_STATS_TTL seconds; stale values are served meanwhile.
+DASHBOARD_STATS_TTL = int(os.environ.get('DASHBOARD_STATS_TTL', '60'))
+LOW_STOCK_THRESHOLD = int(os.environ.get('LOW_STOCK_THRESHOLD', '5'))
 
 # CORS
 CORS_ALLOW_ALL_ORIGINS = os.environ.get('CORS_ALLOW_ALL', 'true').lower() == 'true'
@@ -173,6 +251,8 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=int(os.environ.get('JWT_ACCESS_MINUTES', '60'))),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=int(os.environ.get('JWT_REFRESH_DAYS', '7'))),
 }
+# Seconds api.authentication.CachedJWTAuthentication keeps a token's user cached; 0 disables it.
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', '60'))
 
 # Email Configuration
 EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
@@ -184,7 +264,18 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER)
 
+# Order confirmation emails are sent in batches over one connection (api.emails).
+ORDER_EMAIL_BATCH_SIZE = int(os.environ.get('ORDER_EMAIL_BATCH_SIZE', '100'))
+ORDER_EMAIL_BATCH_DELAY = int(os.environ.get('ORDER_EMAIL_BATCH_DELAY', '5'))
+ORDER_EMAIL_MAX_ATTEMPTS = int(os.environ.get('ORDER_EMAIL_MAX_ATTEMPTS', '5'))
+# Seconds a dispatcher's claim on a batch lasts; a crashed worker's orders become due again after it.
+ORDER_EMAIL_CLAIM_TIMEOUT = int(os.environ.get('ORDER_EMAIL_CLAIM_TIMEOUT', '300'))
+
 # Celery Configuration
+# Tasks are written to the api_outboxmessage table and published by
+# `manage.py dispatch_outbox` (or the publish_outbox beat task) in batches.
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', '500'))
+OUTBOX_POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL', '0.5'))
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://redis:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://redis:6379/0')
 CELERY_ACCEPT_CONTENT = ['json']
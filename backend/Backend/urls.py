@@ -1,9 +1,10 @@
 from django.contrib import admin
 from django.urls import path, include, re_path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.views import TokenRefreshView
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
+from api.views import ThrottledTokenObtainPairView
 
 # ✅ Swagger schema view
 schema_view = get_schema_view(
@@ -23,7 +24,7 @@ urlpatterns = [
     path('api/', include('api.urls')),
 
     # JWT Authentication
-    path('api/auth/jwt/create/', TokenObtainPairView.as_view(), name='jwt_obtain_pair'),
+    path('api/auth/jwt/create/', ThrottledTokenObtainPairView.as_view(), name='jwt_obtain_pair'),
     path('api/auth/jwt/refresh/', TokenRefreshView.as_view(), name='jwt_refresh'),
 
     # ✅ Swagger & ReDoc
@@ -0,0 +1,110 @@
+"""
+Native async read views for the public catalog, served under ``/api/async/``
+when the project runs under an ASGI server (``uvicorn Backend.asgi:application``).
+
+They return the same product and category representations as the DRF viewsets,
+built with the same serializers and filters, but query through Django's async
+ORM API, so a slow query does not hold a worker thread. The product list only
+pages forward, with its own keyset cursor, and its responses are not cached.
+"""
+import base64
+import functools
+import json
+
+from django.db.models import Q
+from django.http import HttpResponseNotAllowed, JsonResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param
+
+from .facets import afacet_counts
+from .filters import CatalogFilterBackend, catalog_selection
+from .models import Category, Product
+from .pagination import ProductCursorPagination
+from .serializers import CategorySerializer, ProductListSerializer, ProductSerializer
+
+
+def get_only(view):
+    # django.views.decorators.http.require_GET only wraps sync views in Django 4.2.
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return HttpResponseNotAllowed(["GET", "HEAD"])
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def _json(data, status=200):
+    return JsonResponse(data, encoder=JSONEncoder, safe=False, status=status)
+
+
+def _encode_cursor(product) -> str:
+    return base64.urlsafe_b64encode(json.dumps([product.name, product.id]).encode()).decode()
+
+
+def _decode_cursor(raw: str):
+    try:
+        name, pk = json.loads(base64.urlsafe_b64decode(raw.encode()))
+        return str(name), int(pk)
+    except (TypeError, ValueError):
+        raise ValidationError({"cursor": "Invalid cursor."})
+
+
+def _page_size(params) -> int:
+    pagination = ProductCursorPagination
+    try:
+        size = int(params.get(pagination.page_size_query_param, pagination.page_size))
+    except ValueError:
+        return pagination.page_size
+    return min(max(size, 1), pagination.max_page_size)
+
+
+@get_only
+async def product_list(request):
+    """Active products in (name, id) order, filtered and faceted like ``GET /api/products/``."""
+    drf_request = Request(request)
+    params = drf_request.query_params
+    compact = params.get("view") == "compact"
+    serializer_class = ProductListSerializer if compact else ProductSerializer
+    queryset = Product.objects.filter(is_active=True).order_by("name", "id")
+    if not compact:
+        queryset = queryset.select_related("owner")
+    try:
+        queryset = CatalogFilterBackend().filter_queryset(drf_request, queryset, None)
+        selection = catalog_selection(params)
+        cursor = params.get("cursor")
+        if cursor:
+            name, pk = _decode_cursor(cursor)
+            queryset = queryset.filter(Q(name__gt=name) | Q(name=name, id__gt=pk))
+    except ValidationError as exc:
+        return _json(exc.detail, status=400)
+
+    size = _page_size(params)
+    products = [product async for product in queryset[:size + 1]]
+    next_url = None
+    if len(products) > size:
+        products = products[:size]
+        next_url = replace_query_param(request.build_absolute_uri(), "cursor", _encode_cursor(products[-1]))
+    serializer = serializer_class(products, many=True, context={"request": drf_request})
+    return _json({
+        "next": next_url,
+        "previous": None,
+        "results": serializer.data,
+        "facets": await afacet_counts(**selection),
+    })
+
+
+@get_only
+async def product_detail(request, pk):
+    try:
+        product = await Product.objects.filter(is_active=True).select_related("owner").aget(pk=pk)
+    except Product.DoesNotExist:
+        return _json({"detail": "Not found."}, status=404)
+    return _json(ProductSerializer(product, context={"request": Request(request)}).data)
+
+
+@get_only
+async def category_list(request):
+    categories = [category async for category in Category.objects.all()]
+    return _json(CategorySerializer(categories, many=True).data)
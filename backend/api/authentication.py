@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+_USER_KEY = "auth:user-fields:{}"
+# What authorization and the profile endpoints read. The password hash is never
+# cached; the revoked-token check compares the digest the token itself carries.
+CACHED_FIELDS = (
+    "id", "username", "email", "first_name", "last_name",
+    "is_active", "is_staff", "is_superuser", "date_joined", "last_login",
+)
+
+
+def user_cache_key(user_id) -> str:
+    return _USER_KEY.format(user_id)
+
+
+def forget_user(user_id) -> None:
+    cache.delete(user_cache_key(user_id))
+
+
+def _cache_entry(user) -> dict:
+    entry = {name: getattr(user, name) for name in CACHED_FIELDS}
+    entry["password_digest"] = get_md5_hash_password(user.password) if api_settings.CHECK_REVOKE_TOKEN else ""
+    return entry
+
+
+def _user_from_entry(entry):
+    """
+    A User with only CACHED_FIELDS loaded. Other fields, the password included,
+    load on first access, and save() writes back only the loaded fields.
+    """
+    model = get_user_model()
+    # from_db takes the loaded values in the model's field order.
+    names = [field.attname for field in model._meta.concrete_fields if field.attname in CACHED_FIELDS]
+    return model.from_db(router.db_for_read(model), names, [entry[name] for name in names])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that keeps the token's user in the cache for
+    AUTH_USER_CACHE_TTL seconds, so an authenticated request does not start
+    with a ``User`` query. Only CACHED_FIELDS are cached, not the whole user.
+
+    Saving or deleting a user drops the entry (see signals.py). Bulk
+    ``User.objects.update()`` bypasses that, so it can be up to one TTL late.
+    The inactive and revoked-token checks still run against the cached copy.
+    """
+
+    def get_user(self, validated_token):
+        ttl = settings.AUTH_USER_CACHE_TTL
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if not ttl or user_id is None:
+            return super().get_user(validated_token)
+
+        key = user_cache_key(user_id)
+        entry = cache.get(key)
+        if entry is None:
+            user = super().get_user(validated_token)
+            cache.set(key, _cache_entry(user), ttl)
+            return user
+
+        if not entry["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != entry["password_digest"]:
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return _user_from_entry(entry)
@@ -0,0 +1,132 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+
+CATALOG = "catalog"
+
+_VERSION_KEY = "respcache:version:{}"
+_STATS_KEY = "respcache:stats:{}"
+_LOCK_KEY = "lock:{}"
+
+
+def namespace_version(namespace: str) -> int:
+    key = _VERSION_KEY.format(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock rather than 1 so an evicted counter never reuses a
+        # version whose entries may still be cached.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(namespace: str) -> None:
+    """Orphan every cached response in ``namespace`` by bumping its version."""
+    key = _VERSION_KEY.format(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def _count(outcome: str) -> None:
+    key = _STATS_KEY.format(outcome)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+
+def stats() -> dict:
+    hits = cache.get(_STATS_KEY.format("hit"), 0)
+    misses = cache.get(_STATS_KEY.format("miss"), 0)
+    lookups = hits + misses
+    return {"hits": hits, "misses": misses, "hit_ratio": round(hits / lookups, 4) if lookups else None}
+
+
+def get_or_refresh(key: str, compute, ttl: int, stale_ttl: int = 600, lock_timeout: int = 30):
+    """
+    Cached ``compute()`` that is fresh for ``ttl`` seconds and protected against stampedes.
+
+    Once an entry goes stale, the first caller to take the rebuild lock
+    recomputes it. Everyone else keeps getting the stale value, for up to
+    ``stale_ttl`` more seconds. On a cold key, callers that lose the lock wait
+    briefly for the winner before computing the value themselves.
+    """
+    lock_key = _LOCK_KEY.format(key)
+    entry = cache.get(key)
+    if entry is not None:
+        value, fresh_until = entry
+        if time.time() < fresh_until or not cache.add(lock_key, 1, timeout=lock_timeout):
+            return value
+        owns_lock = True
+    else:
+        owns_lock = cache.add(lock_key, 1, timeout=lock_timeout)
+        deadline = time.monotonic() + min(lock_timeout, 5)
+        while not owns_lock and time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+    try:
+        value = compute()
+        cache.set(key, (value, time.time() + ttl), timeout=ttl + stale_ttl)
+    finally:
+        if owns_lock:
+            cache.delete(lock_key)
+    return value
+
+
+class CachedResponseMixin:
+    """
+    Server-side cache for ``list`` and ``retrieve``, keyed by namespace version,
+    path, query string and renderer. Writes invalidate a whole namespace (see
+    signals.py), so entries never need to be tracked individually.
+
+    Must come before ConditionalGetMixin in the bases: cached entries keep their
+    validators, so a revalidation hit is answered with 304 without touching the DB.
+    """
+
+    cache_namespace = CATALOG
+
+    def _cache_key(self, request) -> str:
+        raw = f"{request.get_full_path()}|{request.accepted_renderer.format}"
+        digest = hashlib.sha256(raw.encode()).hexdigest()[:32]
+        return f"respcache:{self.cache_namespace}:{namespace_version(self.cache_namespace)}:{digest}"
+
+    def _cached_response(self, request, build):
+        timeout = settings.CATALOG_CACHE_TIMEOUT
+        if not timeout:
+            return build()
+        key = self._cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            _count("hit")
+            data, etag, last_modified = entry
+            response = self._conditional_response(request, etag, last_modified, lambda: Response(data))
+            response["X-Cache"] = "HIT"
+            return response
+
+        _count("miss")
+        response = build()
+        if response.status_code == 200 and getattr(response, "data", None) is not None:
+            timestamp = parse_http_date_safe(response.get("Last-Modified", ""))
+            last_modified = datetime.fromtimestamp(timestamp, tz=timezone.utc) if timestamp else None
+            cache.set(key, (response.data, response.get("ETag"), last_modified), timeout)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(request, lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            request, lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs)
+        )
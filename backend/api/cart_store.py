@@ -0,0 +1,221 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
+
+from .models import Cart, CartItem, Product
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseCartStore:
+    """Carts live in Cart/CartItem; every call goes straight to the database."""
+
+    def _cart(self, user):
+        cart, _ = Cart.objects.get_or_create(user=user)
+        return cart
+
+    def _loaded(self, cart):
+        prefetch_related_objects([cart], Prefetch("items", queryset=CartItem.objects.select_related("product")))
+        return cart
+
+    def load(self, user):
+        return self._loaded(self._cart(user))
+
+    def add(self, user, product_id, quantity):
+        cart = self._cart(user)
+        cart.add_product(product_id, quantity)
+        return self._loaded(cart)
+
+    def update(self, user, product_id, quantity):
+        """Set the quantity of an existing line; returns None when the cart has no such line."""
+        cart = self._cart(user)
+        if not cart.items.filter(product_id=product_id).update(quantity=quantity, updated_at=timezone.now()):
+            return None
+        return self._loaded(cart)
+
+    def remove(self, user, product_id):
+        cart = self._cart(user)
+        cart.items.filter(product_id=product_id).delete()
+        return self._loaded(cart)
+
+    def apply(self, user, increments, quantities):
+        cart = self._cart(user)
+        cart.apply_changes(increments, quantities)
+        return self._loaded(cart)
+
+    def flush(self, user_id, force=False):
+        pass
+
+    def flush_dirty(self, limit=500):
+        return 0
+
+    def clear(self, user_id):
+        pass
+
+
+class RedisCartStore:
+    """
+    Keeps active carts in Redis hashes (``cart:<user id>``: product id -> quantity)
+    and writes them back to Cart/CartItem behind the request.
+
+    A mutation marks the cart dirty and, the first time, schedules the
+    ``flush_cart`` task after CART_FLUSH_DELAY seconds. Checkout calls
+    ``flush(force=True)`` so the order is built from the cart the user saw.
+    Rendered carts are unsaved CartItem rows, so line ids and timestamps are null.
+    """
+
+    DIRTY_KEY = "carts:dirty"
+    # Holds the Cart id; its presence also marks the hash as hydrated from the DB.
+    META_FIELD = "_cart"
+
+    def __init__(self, client=None):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(settings.CART_REDIS_URL, decode_responses=True)
+        self.client = client
+
+    def _key(self, user_id):
+        return f"cart:{user_id}"
+
+    def _hydrate(self, user_id):
+        cart, _ = Cart.objects.get_or_create(user_id=user_id)
+        pipe = self.client.pipeline()
+        # HSETNX never overwrites, so a concurrent mutation on a hydrated field wins.
+        pipe.hsetnx(self._key(user_id), self.META_FIELD, cart.pk)
+        for product_id, quantity in cart.items.values_list("product_id", "quantity"):
+            pipe.hsetnx(self._key(user_id), str(product_id), quantity)
+        pipe.expire(self._key(user_id), settings.CART_REDIS_TTL)
+        pipe.execute()
+
+    def _read(self, user_id):
+        raw = self.client.hgetall(self._key(user_id))
+        if not raw:
+            self._hydrate(user_id)
+            raw = self.client.hgetall(self._key(user_id))
+        cart_id = raw.pop(self.META_FIELD, None)
+        lines = {int(product_id): int(quantity) for product_id, quantity in raw.items() if int(quantity) > 0}
+        return (int(cart_id) if cart_id else None), lines
+
+    def _mutate(self, user_id, commands):
+        if not self.client.exists(self._key(user_id)):
+            self._hydrate(user_id)
+        pipe = self.client.pipeline()
+        for name, *args in commands:
+            getattr(pipe, name)(self._key(user_id), *args)
+        pipe.expire(self._key(user_id), settings.CART_REDIS_TTL)
+        pipe.sadd(self.DIRTY_KEY, user_id)
+        newly_dirty = pipe.execute()[-1]
+        if newly_dirty:
+            self._schedule_flush(user_id)
+
+    def _schedule_flush(self, user_id):
+        from .tasks import flush_cart
+
+        try:
+            flush_cart.apply_async((user_id,), countdown=settings.CART_FLUSH_DELAY)
+        except Exception:
+            # The cart stays dirty; flush_dirty_carts or checkout will persist it.
+            logger.exception("Could not schedule cart flush for user %s", user_id)
+
+    def load(self, user):
+        cart_id, lines = self._read(user.pk)
+        cart = Cart(id=cart_id, user=user)
+        products = Product.objects.in_bulk(list(lines))
+        items = [
+            CartItem(cart=cart, product=products[product_id], quantity=quantity)
+            for product_id, quantity in sorted(lines.items())
+            if product_id in products
+        ]
+        cart._prefetched_objects_cache = {"items": items}
+        return cart
+
+    def add(self, user, product_id, quantity):
+        self._mutate(user.pk, [("hincrby", str(product_id), quantity)])
+        return self.load(user)
+
+    def update(self, user, product_id, quantity):
+        _, lines = self._read(user.pk)
+        if product_id not in lines:
+            return None
+        self._mutate(user.pk, [("hset", str(product_id), quantity)])
+        return self.load(user)
+
+    def remove(self, user, product_id):
+        self._mutate(user.pk, [("hdel", str(product_id))])
+        return self.load(user)
+
+    def apply(self, user, increments, quantities):
+        commands = []
+        for product_id, quantity in quantities.items():
+            commands.append(("hset", str(product_id), quantity) if quantity else ("hdel", str(product_id)))
+        for product_id, quantity in increments.items():
+            commands.append(("hincrby", str(product_id), quantity))
+        self._mutate(user.pk, commands)
+        return self.load(user)
+
+    def flush(self, user_id, force=False):
+        """
+        Write the Redis copy of a cart to the database if it changed (or always, with
+        ``force``). The dirty mark is dropped before the cart is read, so a mutation
+        that lands mid-flush marks it again, and is put back if the write fails.
+        """
+        dirty = self.client.srem(self.DIRTY_KEY, user_id)
+        if not dirty and not force:
+            return
+        try:
+            self._write(user_id)
+        except Exception:
+            if dirty:
+                self.client.sadd(self.DIRTY_KEY, user_id)
+            raise
+
+    def _write(self, user_id):
+        raw = self.client.hgetall(self._key(user_id))
+        if not raw:
+            return
+        raw.pop(self.META_FIELD, None)
+        lines = {int(product_id): int(quantity) for product_id, quantity in raw.items() if int(quantity) > 0}
+        # Lines for products deleted since they were added are dropped, as load() does.
+        existing = set(Product.objects.filter(pk__in=list(lines)).values_list("pk", flat=True))
+        lines = {product_id: quantity for product_id, quantity in lines.items() if product_id in existing}
+        with transaction.atomic():
+            cart, _ = Cart.objects.get_or_create(user_id=user_id)
+            cart.items.exclude(product_id__in=list(lines)).delete()
+            cart.apply_changes({}, lines)
+
+    def flush_dirty(self, limit=500):
+        """Flush up to ``limit`` dirty carts; a cart that fails to write stays marked for the next run."""
+        flushed = 0
+        for user_id in self.client.srandmember(self.DIRTY_KEY, limit) or []:
+            try:
+                self.flush(int(user_id))
+            except Exception:
+                logger.exception("Could not flush the cart of user %s", user_id)
+            else:
+                flushed += 1
+        return flushed
+
+    def clear(self, user_id):
+        pipe = self.client.pipeline()
+        pipe.delete(self._key(user_id))
+        pipe.srem(self.DIRTY_KEY, user_id)
+        pipe.execute()
+
+
+STORES = {
+    "database": DatabaseCartStore,
+    "redis": RedisCartStore,
+}
+
+_instances = {}
+
+
+def get_cart_store():
+    backend = settings.CART_STORE
+    if backend not in _instances:
+        _instances[backend] = STORES[backend]()
+    return _instances[backend]
@@ -0,0 +1,60 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETag / Last-Modified validators for ``list`` and ``retrieve``.
+
+    Validators are derived from row metadata rather than the rendered body: a
+    detail ETag comes from the object's ``updated_at``, a list ETag from
+    max(``updated_at``) and the row count of every model in
+    ``conditional_models``. Either way the serializer only runs when the client's
+    copy is stale.
+    """
+
+    conditional_models = ()
+
+    def _etag(self, request, *parts) -> str:
+        key = "|".join(str(part) for part in (request.get_full_path(), request.accepted_renderer.format, *parts))
+        return quote_etag(hashlib.sha256(key.encode()).hexdigest()[:32])
+
+    def get_list_validators(self, request):
+        parts, latest = [], None
+        for model in self.conditional_models:
+            stats = model.objects.order_by().aggregate(latest=Max("updated_at"), rows=Count("pk"))
+            parts += [model._meta.label, stats["latest"], stats["rows"]]
+            if stats["latest"] and (latest is None or stats["latest"] > latest):
+                latest = stats["latest"]
+        return self._etag(request, *parts), latest
+
+    def get_detail_validators(self, request, instance):
+        return self._etag(request, instance.pk, instance.updated_at.isoformat()), instance.updated_at
+
+    def _conditional_response(self, request, etag, last_modified, build):
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = build()
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = self.get_list_validators(request)
+        return self._conditional_response(
+            request, etag, last_modified, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self.get_detail_validators(request, instance)
+        return self._conditional_response(
+            request, etag, last_modified, lambda: Response(self.get_serializer(instance).data)
+        )
@@ -0,0 +1,44 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Category, Product
+
+
+def counted_category(category_id, is_active):
+    """Category whose counter includes a product in this state, if any."""
+    return category_id if is_active else None
+
+
+def apply_move(old_category_id, new_category_id) -> None:
+    # update() skips auto_now, so stamp updated_at here: the category's ETag and
+    # Last-Modified are derived from it and must change with product_count.
+    if old_category_id == new_category_id:
+        return
+    now = timezone.now()
+    if old_category_id is not None:
+        Category.objects.filter(pk=old_category_id).update(
+            product_count=Greatest(F("product_count") - 1, 0), updated_at=now
+        )
+    if new_category_id is not None:
+        Category.objects.filter(pk=new_category_id).update(product_count=F("product_count") + 1, updated_at=now)
+
+
+def actual_product_count():
+    active = (
+        Product.objects.filter(category=OuterRef("pk"), is_active=True)
+        .order_by()
+        .values("category")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    return Coalesce(Subquery(active, output_field=IntegerField()), Value(0))
+
+
+def reconcile() -> int:
+    """Repair drifted counters in one UPDATE; returns how many categories were off."""
+    drifted = Category.objects.alias(actual=actual_product_count()).exclude(product_count=F("actual"))
+    ids = list(drifted.values_list("pk", flat=True))
+    if ids:
+        Category.objects.filter(pk__in=ids).update(product_count=actual_product_count(), updated_at=timezone.now())
+    return len(ids)
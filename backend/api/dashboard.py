@@ -0,0 +1,67 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from . import cache, rollups
+from .models import DailyProductSales, DailySales, Order, Product
+
+
+STATS_KEY = "dashboard:stats"
+TOP_SELLERS = 5
+
+
+def _today_start():
+    return timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+
+
+def _revenue_since(days: int, today_revenue):
+    """Revenue over the last ``days`` days: rolled-up past days plus today's live figure."""
+    today = timezone.localdate()
+    past = DailySales.objects.filter(day__gte=today - timedelta(days=days - 1), day__lt=today)
+    return (past.aggregate(total=Sum("revenue"))["total"] or 0) + today_revenue
+
+
+def compute_stats() -> dict:
+    """
+    Headline numbers for the admin dashboard.
+
+    Past days come from the sales rollups and only today is aggregated live,
+    over the ``created_at`` index. Top sellers cover the last 30 rolled-up days.
+    """
+    products = Product.objects.order_by().aggregate(
+        total=Count("id"),
+        active=Count("id", filter=Q(is_active=True)),
+        low_stock=Count("id", filter=Q(is_active=True, stock__lte=settings.LOW_STOCK_THRESHOLD)),
+    )
+    today = Order.objects.filter(created_at__gte=_today_start()).order_by().aggregate(
+        orders=Count("id"),
+        revenue=Sum("total_amount", filter=Q(status__in=rollups.COUNTED_STATUSES)),
+    )
+    today_revenue = today["revenue"] or 0
+    top_sellers = (
+        DailyProductSales.objects.filter(day__gte=timezone.localdate() - timedelta(days=29))
+        .values("product_id", "product__name")
+        .annotate(units=Sum("units"), revenue=Sum("revenue"))
+        .order_by("-units", "product_id")[:TOP_SELLERS]
+    )
+    return {
+        "products": products["total"],
+        "active_products": products["active"],
+        "low_stock": products["low_stock"],
+        "orders_today": today["orders"],
+        "revenue_today": today_revenue,
+        "revenue_7d": _revenue_since(7, today_revenue),
+        "revenue_30d": _revenue_since(30, today_revenue),
+        "top_sellers": [
+            {"product_id": row["product_id"], "name": row["product__name"], "units": row["units"],
+             "revenue": row["revenue"]}
+            for row in top_sellers
+        ],
+        "generated_at": timezone.now(),
+    }
+
+
+def stats() -> dict:
+    return cache.get_or_refresh(STATS_KEY, compute_stats, ttl=settings.DASHBOARD_STATS_TTL)
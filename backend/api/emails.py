@@ -0,0 +1,120 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F, Prefetch, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from . import outbox
+from .models import Order, OrderItem
+
+logger = logging.getLogger(__name__)
+
+SITE_NAME = "SK Mart"
+ORDERS_URL = "http://localhost:5173/orders"
+# Loaded through Django's cached template loader, so each is compiled once per process.
+CONFIRMATION_HTML = "api/emails/order_confirmation.html"
+CONFIRMATION_TEXT = "api/emails/order_confirmation.txt"
+
+
+def due_confirmations():
+    """
+    Paid orders whose confirmation has not been sent, still has attempts left and
+    is not claimed by a running dispatch.
+    """
+    return Order.objects.filter(
+        Q(confirmation_claimed_until__isnull=True) | Q(confirmation_claimed_until__lt=timezone.now()),
+        status="paid",
+        confirmation_sent_at__isnull=True,
+        confirmation_attempts__lt=settings.ORDER_EMAIL_MAX_ATTEMPTS,
+    ).exclude(user__email="")
+
+
+def with_email_context(orders):
+    """Everything build_confirmation reads, in one query for the orders and one for their lines."""
+    return orders.select_related("user").prefetch_related(
+        Prefetch("items", queryset=OrderItem.objects.select_related("product").order_by("id"))
+    )
+
+
+def build_confirmation(order) -> EmailMultiAlternatives:
+    """Order confirmation (HTML with a plain text alternative) for ``order.user``."""
+    context = {
+        "order": order,
+        # Format order number (SK-0001, SK-0002, etc.)
+        "order_number": f"SK-{order.id:04d}",
+        "order_items": order.items.all(),
+        "site_name": SITE_NAME,
+        "orders_url": ORDERS_URL,
+    }
+    subject = f"Order Confirmation - {context['order_number']} | {SITE_NAME}"
+    from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@skmart.com')
+    msg = EmailMultiAlternatives(
+        subject, render_to_string(CONFIRMATION_TEXT, context), from_email, [order.user.email]
+    )
+    msg.attach_alternative(render_to_string(CONFIRMATION_HTML, context), "text/html")
+    return msg
+
+
+def dispatch_confirmations(limit: int = None, orders=None) -> dict:
+    """
+    Send up to ``limit`` due confirmation emails over a single SMTP connection.
+
+    The batch is claimed in a short transaction: rows are picked with
+    ``SELECT ... FOR UPDATE SKIP LOCKED`` (a no-op on SQLite) and leased for
+    ORDER_EMAIL_CLAIM_TIMEOUT seconds, so parallel workers split the backlog
+    instead of double-sending. Mail goes out after that commit, with no row locked,
+    rendered from one prefetch and sent one by one through the same open
+    connection, so a rejected address only costs that order an attempt. A second
+    short transaction records the outcome and drops the lease. An order stops
+    being retried after ORDER_EMAIL_MAX_ATTEMPTS failures.
+    """
+    limit = limit or settings.ORDER_EMAIL_BATCH_SIZE
+    stats = {"sent": 0, "failed": 0}
+    with transaction.atomic():
+        claimed = (orders if orders is not None else due_confirmations()).order_by("id")
+        ids = list(claimed.select_for_update(skip_locked=True, of=("self",)).values_list("pk", flat=True)[:limit])
+        if not ids:
+            return stats
+        lease = timezone.now() + timedelta(seconds=settings.ORDER_EMAIL_CLAIM_TIMEOUT)
+        Order.objects.filter(pk__in=ids).update(confirmation_claimed_until=lease)
+
+    sent, failed = [], []
+    connection = get_connection()
+    try:
+        connection.open()
+        for order in with_email_context(Order.objects.filter(pk__in=ids).order_by("id")):
+            try:
+                delivered = connection.send_messages([build_confirmation(order)])
+            except Exception:
+                logger.exception("Could not send the confirmation for order %s", order.pk)
+                delivered = 0
+            (sent if delivered else failed).append(order.pk)
+    finally:
+        connection.close()
+        # Orders never attempted (e.g. the connection could not open) count as failed.
+        failed += [pk for pk in ids if pk not in sent and pk not in failed]
+        with transaction.atomic():
+            if sent:
+                Order.objects.filter(pk__in=sent).update(
+                    confirmation_sent_at=timezone.now(), confirmation_claimed_until=None
+                )
+            if failed:
+                Order.objects.filter(pk__in=failed).update(
+                    confirmation_attempts=F("confirmation_attempts") + 1, confirmation_claimed_until=None
+                )
+    stats.update(sent=len(sent), failed=len(failed))
+    return stats
+
+
+def schedule_dispatch() -> None:
+    """
+    Queue a dispatch shortly, through the outbox, so confirmations from a burst of
+    checkouts share a batch. Call inside the transaction that made the order due.
+    """
+    outbox.enqueue(
+        "api.tasks.send_order_confirmations", countdown=settings.ORDER_EMAIL_BATCH_DELAY, coalesce=True
+    )
@@ -0,0 +1,86 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import OrderItem, Product
+
+
+EXPORT_FORMATS = ("ndjson", "csv")
+CONTENT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+DEFAULT_CHUNK_SIZE = 2000
+
+# (output column, ORM lookup)
+PRODUCT_COLUMNS = [
+    ("id", "id"),
+    ("slug", "slug"),
+    ("name", "name"),
+    ("category", "category__slug"),
+    ("price", "price"),
+    ("stock", "stock"),
+    ("is_active", "is_active"),
+    ("updated_at", "updated_at"),
+]
+
+ORDER_ITEM_COLUMNS = [
+    ("order_id", "order_id"),
+    ("order_status", "order__status"),
+    ("ordered_at", "order__created_at"),
+    ("user_id", "order__user_id"),
+    ("product_id", "product_id"),
+    ("product_slug", "product__slug"),
+    ("unit_price", "unit_price"),
+    ("quantity", "quantity"),
+]
+
+
+def product_rows(chunk_size: int = DEFAULT_CHUNK_SIZE):
+    lookups = [lookup for _, lookup in PRODUCT_COLUMNS]
+    return Product.objects.order_by("id").values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+def order_item_rows(chunk_size: int = DEFAULT_CHUNK_SIZE, status=None):
+    lookups = [lookup for _, lookup in ORDER_ITEM_COLUMNS]
+    queryset = OrderItem.objects.order_by("order_id", "id")
+    if status:
+        queryset = queryset.filter(order__status=status)
+    return queryset.values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the csv writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def render(rows, columns, fmt: str, buffer_size: int = 64 * 1024):
+    """
+    Encode ``rows`` (tuples in ``columns`` order) as NDJSON or CSV, yielding
+    text blocks of roughly ``buffer_size`` characters. Only one block is held
+    in memory at a time.
+    """
+    names = [name for name, _ in columns]
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        lines = (writer.writerow([_csv_value(value) for value in row]) for row in rows)
+        header = writer.writerow(names)
+    elif fmt == "ndjson":
+        encoder = DjangoJSONEncoder()
+        lines = (encoder.encode(dict(zip(names, row))) + "\n" for row in rows)
+        header = ""
+    else:
+        raise ValueError(f"Unsupported export format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+
+    block, size = [header], len(header)
+    for line in lines:
+        block.append(line)
+        size += len(line)
+        if size >= buffer_size:
+            yield "".join(block)
+            block, size = [], 0
+    if block:
+        yield "".join(block)
@@ -0,0 +1,138 @@
+from bisect import bisect_right
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Product, ProductFacetCount
+
+
+def price_band_bounds():
+    """Upper bounds of the price bands; the last band is open-ended."""
+    return [Decimal(str(bound)) for bound in settings.CATALOG_PRICE_BANDS]
+
+
+def price_band(price) -> int:
+    return bisect_right(price_band_bounds(), Decimal(str(price)))
+
+
+def price_band_label(band: int) -> str:
+    bounds = price_band_bounds()
+    lower = bounds[band - 1] if band > 0 else Decimal("0")
+    if band >= len(bounds):
+        return f"{lower}+"
+    return f"{lower}-{bounds[band]}"
+
+
+def price_band_q(band: int) -> Q:
+    """Q object selecting products whose price falls inside ``band``."""
+    bounds = price_band_bounds()
+    condition = Q()
+    if band > 0:
+        condition &= Q(price__gte=bounds[band - 1])
+    if band < len(bounds):
+        condition &= Q(price__lt=bounds[band])
+    return condition
+
+
+def facet_key(category_id, price, stock, is_active):
+    """Summary bucket a product belongs to, or None when it is not listed."""
+    if not is_active:
+        return None
+    return (category_id, price_band(price), stock > 0)
+
+
+def apply_delta(key, delta: int) -> None:
+    if key is None or delta == 0:
+        return
+    category_id, band, in_stock = key
+    bucket = ProductFacetCount.objects.filter(category_id=category_id, price_band=band, in_stock=in_stock)
+    if bucket.update(count=F("count") + delta) or delta < 0:
+        return
+    # First product in this bucket; the savepoint lets a concurrent creator win.
+    obj, _ = ProductFacetCount.objects.get_or_create(
+        category_id=category_id, price_band=band, in_stock=in_stock
+    )
+    ProductFacetCount.objects.filter(pk=obj.pk).update(count=F("count") + delta)
+
+
+@transaction.atomic
+def rebuild() -> int:
+    """Recompute every bucket from Product; use after bulk writes that bypass signals."""
+    bounds = price_band_bounds()
+    band = Case(
+        *[When(price__lt=bound, then=Value(i)) for i, bound in enumerate(bounds)],
+        default=Value(len(bounds)),
+        output_field=IntegerField(),
+    )
+    rows = (
+        Product.objects.filter(is_active=True)
+        .annotate(
+            band=band,
+            has_stock=Case(When(stock__gt=0, then=Value(True)), default=Value(False), output_field=BooleanField()),
+        )
+        .values("category_id", "band", "has_stock")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    ProductFacetCount.objects.all().delete()
+    buckets = ProductFacetCount.objects.bulk_create([
+        ProductFacetCount(
+            category_id=row["category_id"], price_band=row["band"], in_stock=row["has_stock"], count=row["total"]
+        )
+        for row in rows
+    ])
+    return len(buckets)
+
+
+def _facet_queries(categories=None, price_bands=None, in_stock=None):
+    def buckets(skip):
+        qs = ProductFacetCount.objects.filter(count__gt=0)
+        if categories and skip != "category":
+            qs = qs.filter(category_id__in=categories)
+        if price_bands and skip != "price_band":
+            qs = qs.filter(price_band__in=price_bands)
+        if in_stock is not None and skip != "in_stock":
+            qs = qs.filter(in_stock=in_stock)
+        return qs.order_by()
+
+    total = Coalesce(Sum("count"), 0)
+    category_rows = (
+        buckets("category")
+        .values("category_id", name=F("category__name"), slug=F("category__slug"))
+        .annotate(total=total)
+        .order_by("name")
+    )
+    band_rows = buckets("price_band").values("price_band").annotate(total=total).order_by("price_band")
+    stock_rows = buckets("in_stock").values("in_stock").annotate(total=total).order_by("-in_stock")
+    return category_rows, band_rows, stock_rows
+
+
+def _facet_payload(category_rows, band_rows, stock_rows) -> dict:
+    return {
+        "category": [
+            {"id": row["category_id"], "name": row["name"], "slug": row["slug"], "count": row["total"]}
+            for row in category_rows
+        ],
+        "price_band": [
+            {"band": row["price_band"], "label": price_band_label(row["price_band"]), "count": row["total"]}
+            for row in band_rows
+        ],
+        "in_stock": [{"value": row["in_stock"], "count": row["total"]} for row in stock_rows],
+    }
+
+
+def facet_counts(categories=None, price_bands=None, in_stock=None) -> dict:
+    """
+    Facet counts for the current selection. Each facet is counted with every
+    filter applied except its own, so the options of a facet stay selectable.
+    """
+    return _facet_payload(*_facet_queries(categories, price_bands, in_stock))
+
+
+async def afacet_counts(categories=None, price_bands=None, in_stock=None) -> dict:
+    """facet_counts() for async views."""
+    queries = _facet_queries(categories, price_bands, in_stock)
+    return _facet_payload(*[[row async for row in rows] for rows in queries])
@@ -0,0 +1,56 @@
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .facets import price_band_bounds, price_band_q
+
+
+def _int_list(params, name):
+    raw = params.get(name, "")
+    if not raw:
+        return []
+    try:
+        return [int(value) for value in raw.split(",") if value.strip()]
+    except ValueError:
+        raise ValidationError({name: "Expected a comma-separated list of integers."})
+
+
+def catalog_selection(params) -> dict:
+    """Parse the catalog filter query parameters into facet selections."""
+    in_stock = params.get("in_stock")
+    if in_stock is not None:
+        if in_stock.lower() not in ("true", "false", "1", "0"):
+            raise ValidationError({"in_stock": "Expected true or false."})
+        in_stock = in_stock.lower() in ("true", "1")
+    price_bands = _int_list(params, "price_band")
+    # Band n covers prices below bound n; the band past the last bound is open-ended.
+    last_band = len(price_band_bounds())
+    if any(not 0 <= band <= last_band for band in price_bands):
+        raise ValidationError({"price_band": f"Expected bands between 0 and {last_band}."})
+    return {
+        "categories": _int_list(params, "category"),
+        "price_bands": price_bands,
+        "in_stock": in_stock,
+    }
+
+
+class CatalogFilterBackend(BaseFilterBackend):
+    """
+    Filters products by ``?category=1,2``, ``?price_band=0,3`` and ``?in_stock=true``.
+    Values within one parameter are OR-ed; parameters are AND-ed.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        selection = catalog_selection(request.query_params)
+        if selection["categories"]:
+            queryset = queryset.filter(category_id__in=selection["categories"])
+        if selection["price_bands"]:
+            bands = Q()
+            for band in selection["price_bands"]:
+                bands |= price_band_q(band)
+            queryset = queryset.filter(bands)
+        if selection["in_stock"] is True:
+            queryset = queryset.filter(stock__gt=0)
+        elif selection["in_stock"] is False:
+            queryset = queryset.filter(stock=0)
+        return queryset
@@ -0,0 +1,111 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+
+HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field("key").max_length
+
+
+def fingerprint(request) -> str:
+    body = json.dumps(request.data, sort_keys=True, cls=JSONEncoder)
+    return hashlib.sha256(f"{request.method} {request.path}\n{body}".encode()).hexdigest()
+
+
+def purge_expired() -> int:
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+def _stored(request, key):
+    return IdempotencyKey.objects.filter(user=request.user, key=key, expires_at__gt=timezone.now()).first()
+
+
+def _replay(record, request_fingerprint):
+    if record.fingerprint != request_fingerprint:
+        return Response(
+            {"detail": f"{HEADER} was already used with a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    if not record.status_code:
+        return Response(
+            {"detail": f"A request with this {HEADER} is still being processed."},
+            status=status.HTTP_409_CONFLICT,
+        )
+    return Response(record.response, status=record.status_code, headers={REPLAY_HEADER: "true"})
+
+
+def idempotent(view):
+    """
+    Makes a POST view method safe to retry when the client sends an ``Idempotency-Key`` header.
+
+    The key is claimed by committing its row (``status_code`` 0) before the view
+    runs, so the view is free to use short transactions of its own. The claim
+    expires after IDEMPOTENCY_CLAIM_TIMEOUT seconds, so if the process dies before
+    the response is stored a retry can take the key over. The response is stored
+    in that row afterwards. A duplicate that arrives meanwhile is told to retry
+    with 409, and later ones are answered from this one table without re-running
+    the view. A view that raises, e.g. with a validation error, releases the key,
+    so the request can simply be retried. Keys are scoped per user and kept for
+    IDEMPOTENCY_KEY_TTL seconds once answered.
+    """
+
+    @wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(self, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ValidationError({HEADER: f"Must be 1 to {MAX_KEY_LENGTH} characters."})
+
+        request_fingerprint = fingerprint(request)
+        record = _stored(request, key)
+        if record is not None:
+            return _replay(record, request_fingerprint)
+
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.filter(user=request.user, key=key, expires_at__lte=now).delete()
+                record = IdempotencyKey.objects.create(
+                    user=request.user,
+                    key=key,
+                    fingerprint=request_fingerprint,
+                    status_code=0,
+                    response={},
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_CLAIM_TIMEOUT),
+                )
+        except IntegrityError:
+            # Lost the race for the key: answer from the winner's row.
+            winner = _stored(request, key)
+            if winner is None:
+                raise
+            return _replay(winner, request_fingerprint)
+
+        try:
+            response = view(self, request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+        # Round-trip through DRF's encoder so a replay renders exactly like the original.
+        stored = json.loads(json.dumps(response.data, cls=JSONEncoder))
+        IdempotencyKey.objects.filter(pk=record.pk).update(
+            status_code=response.status_code,
+            response=stored,
+            expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+        )
+        return response
+
+    return wrapper
@@ -0,0 +1,201 @@
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from . import cache, counters, facets
+from .models import Category, Product
+
+
+IMPORT_FORMATS = ("csv", "jsonl")
+UPSERT_FIELDS = ["category", "name", "description", "image_url", "price", "stock", "is_active", "updated_at"]
+MAX_REPORTED_ERRORS = 100
+_PRICE = Product._meta.get_field("price")
+_MAX_PRICE = Decimal(10) ** (_PRICE.max_digits - _PRICE.decimal_places)
+
+
+class ProductImportError(ValueError):
+    pass
+
+
+def detect_format(filename: str) -> str:
+    name = filename.lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    raise ProductImportError(f"Cannot infer the import format of {filename!r}; pass csv or jsonl explicitly")
+
+
+def read_rows(stream, fmt: str):
+    """Yield ``(line_number, row_dict)`` from a text stream, one line at a time."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "jsonl":
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield line_number, ProductImportError(f"invalid JSON: {exc.msg}")
+    else:
+        raise ProductImportError(f"Unsupported import format {fmt!r}; expected one of {', '.join(IMPORT_FORMATS)}")
+
+
+def _as_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y")
+
+
+class CategoryResolver:
+    """In-memory slug/name -> id map, creating categories the catalog has not seen yet."""
+
+    def __init__(self, create_missing: bool = True):
+        self.create_missing = create_missing
+        self.created = 0
+        self._ids = {}
+        for pk, slug, name in Category.objects.values_list("id", "slug", "name"):
+            self._ids[slug] = pk
+            self._ids[name.lower()] = pk
+
+    def resolve(self, value) -> int:
+        key = str(value or "").strip()
+        if not key:
+            raise ProductImportError("category is required")
+        pk = self._ids.get(key) or self._ids.get(key.lower())
+        if pk is None:
+            if not self.create_missing:
+                raise ProductImportError(f"unknown category {key!r}")
+            _check_length(Category, "name", key)
+            _check_length(Category, "slug", slugify(key))
+            category, created = Category.objects.get_or_create(slug=slugify(key), defaults={"name": key})
+            self.created += created
+            pk = self._ids[key] = self._ids[key.lower()] = category.pk
+        return pk
+
+
+def _check_length(model, field: str, value: str) -> None:
+    max_length = model._meta.get_field(field).max_length
+    if len(value) > max_length:
+        raise ProductImportError(f"{field} is longer than {max_length} characters")
+
+
+def _build_product(row, categories: CategoryResolver, owner, now) -> Product:
+    if isinstance(row, Exception):
+        raise row
+    if not isinstance(row, dict):
+        raise ProductImportError("expected an object")
+    slug = str(row.get("slug") or "").strip()
+    name = str(row.get("name") or "").strip()
+    if not slug or not name:
+        raise ProductImportError("slug and name are required")
+    image_url = str(row.get("image_url") or "")
+    for field, value in (("slug", slug), ("name", name), ("image_url", image_url)):
+        _check_length(Product, field, value)
+    try:
+        price = Decimal(str(row.get("price"))).quantize(Decimal(1).scaleb(-_PRICE.decimal_places))
+    except (InvalidOperation, TypeError):
+        raise ProductImportError(f"invalid price {row.get('price')!r}")
+    if not price.is_finite() or not 0 <= price < _MAX_PRICE:
+        raise ProductImportError(f"price {row.get('price')!r} is out of range")
+    try:
+        stock = int(row.get("stock") or 0)
+    except (TypeError, ValueError):
+        raise ProductImportError(f"invalid stock {row.get('stock')!r}")
+    if stock < 0:
+        raise ProductImportError("stock cannot be negative")
+    return Product(
+        category_id=categories.resolve(row.get("category")),
+        name=name,
+        slug=slug,
+        description=str(row.get("description") or ""),
+        image_url=image_url,
+        price=price,
+        stock=stock,
+        is_active=_as_bool(row.get("is_active", True)),
+        owner=owner,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def _upsert(products) -> None:
+    Product.objects.bulk_create(
+        products,
+        update_conflicts=True,
+        unique_fields=["slug"],
+        update_fields=UPSERT_FIELDS,
+    )
+
+
+def _write_batch(batch: dict, stats: dict) -> None:
+    """
+    Upsert ``{slug: (line_number, product)}`` in one statement. When the database
+    rejects it, e.g. a new slug whose (category, name) is already taken, the batch
+    is retried row by row so only the offending rows are skipped.
+    """
+    try:
+        with transaction.atomic():
+            _upsert([product for _, product in batch.values()])
+        stats["imported"] += len(batch)
+    except DatabaseError:
+        for line_number, product in batch.values():
+            try:
+                with transaction.atomic():
+                    _upsert([product])
+            except DatabaseError as exc:
+                _skip(stats, line_number, f"rejected by the database: {exc}")
+            else:
+                stats["imported"] += 1
+    stats["batches"] += 1
+
+
+def _skip(stats: dict, line_number, reason) -> None:
+    stats["skipped"] += 1
+    if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+        stats["errors"].append(f"line {line_number}: {reason}")
+
+
+def import_products(rows, owner, batch_size: int = 1000, create_categories: bool = True) -> dict:
+    """
+    Upsert products keyed on ``slug`` from an iterable of ``(line_number, row)``.
+
+    Rows are consumed lazily and written with one ``INSERT ... ON CONFLICT``
+    per batch, so memory is bounded by ``batch_size``. Invalid rows, and rows
+    the database rejects, are skipped and reported. Existing products keep their
+    owner and creation time.
+    """
+    categories = CategoryResolver(create_missing=create_categories)
+    stats = {"rows": 0, "imported": 0, "batches": 0, "skipped": 0, "errors": []}
+    batch = {}
+    try:
+        for line_number, row in rows:
+            stats["rows"] += 1
+            try:
+                product = _build_product(row, categories, owner, timezone.now())
+            except ProductImportError as exc:
+                _skip(stats, line_number, exc)
+                continue
+            # A slug repeated inside one batch would hit the same row twice in a single
+            # upsert, which Postgres rejects; the last occurrence wins.
+            batch[product.slug] = (line_number, product)
+            if len(batch) >= batch_size:
+                _write_batch(batch, stats)
+                batch = {}
+        if batch:
+            _write_batch(batch, stats)
+    finally:
+        # bulk_create bypasses model signals, so refresh the denormalized catalog data,
+        # including after a run that stopped part way with earlier batches committed.
+        facets.rebuild()
+        counters.reconcile()
+        cache.invalidate(cache.CATALOG)
+
+    stats["categories_created"] = categories.created
+    return stats
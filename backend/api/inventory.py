@@ -0,0 +1,61 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import cache, facets
+from .models import Product
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_id, requested):
+        self.product_id = product_id
+        self.requested = requested
+        super().__init__(f"Product {product_id} does not have {requested} units in stock")
+
+
+def reserve(quantities: dict) -> None:
+    """
+    Take ``{product_id: quantity}`` out of stock inside the caller's transaction.
+
+    Each product is decremented with one conditional ``UPDATE ... WHERE stock >= qty``,
+    so the check and the write happen under the same row lock and concurrent
+    checkouts can never oversell. Rows are visited in primary-key order, so two
+    carts sharing products always lock them in the same order and cannot deadlock.
+    Raises InsufficientStock on the first product that cannot be covered; the
+    caller's transaction rollback releases whatever was already taken.
+    """
+    if not transaction.get_connection().in_atomic_block:
+        raise RuntimeError("inventory.reserve() must run inside a transaction")
+    now = timezone.now()
+    for product_id, quantity in sorted(quantities.items()):
+        reserved = Product.objects.filter(pk=product_id, is_active=True, stock__gte=quantity).update(
+            stock=F("stock") - quantity, updated_at=now
+        )
+        if not reserved:
+            raise InsufficientStock(product_id, quantity)
+
+    # update() bypasses the model signals. A reservation only changes the stock
+    # facet when it takes a product to zero, so adjust just those buckets.
+    sold_out = Product.objects.filter(pk__in=list(quantities), stock=0).values_list(
+        "pk", "category_id", "price", "is_active"
+    )
+    for product_id, category_id, price, is_active in sold_out:
+        facets.apply_delta(facets.facet_key(category_id, price, quantities[product_id], is_active), -1)
+        facets.apply_delta(facets.facet_key(category_id, price, 0, is_active), 1)
+    transaction.on_commit(lambda: cache.invalidate(cache.CATALOG))
+
+
+def release(quantities: dict) -> None:
+    """Put ``{product_id: quantity}`` taken by reserve() back into stock, e.g. after a failed payment."""
+    now = timezone.now()
+    for product_id, quantity in sorted(quantities.items()):
+        Product.objects.filter(pk=product_id).update(stock=F("stock") + quantity, updated_at=now)
+
+    restocked = Product.objects.filter(pk__in=list(quantities)).values_list(
+        "pk", "category_id", "price", "stock", "is_active"
+    )
+    for product_id, category_id, price, stock, is_active in restocked:
+        if stock == quantities[product_id]:
+            facets.apply_delta(facets.facet_key(category_id, price, 0, is_active), -1)
+            facets.apply_delta(facets.facet_key(category_id, price, stock, is_active), 1)
+    transaction.on_commit(lambda: cache.invalidate(cache.CATALOG))
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from api import cache, counters, facets
+from api.models import Category, Product
+
+PATHS = {
+    'list': ('/api/products/?page_size=24', '/api/async/products/?page_size=24'),
+    'detail': ('/api/products/{pk}/', '/api/async/products/{pk}/'),
+    'categories': ('/api/categories/', '/api/async/categories/'),
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def fetch(port: int, path: str) -> int:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n'.encode())
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def load(port: int, path: str, concurrency: int, duration: float, timeout: float):
+    """
+    ``concurrency`` clients issuing back-to-back requests for ``duration`` seconds.
+    A request that fails or takes longer than ``timeout`` counts as an error.
+    """
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                status = await asyncio.wait_for(fetch(port, path), timeout)
+            except (OSError, asyncio.TimeoutError):
+                status = None
+            if status == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the catalog reads: the DRF viewsets under the WSGI runserver against the "
+        "async views under uvicorn, at the same concurrency"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=sorted(PATHS), default='list')
+        parser.add_argument('--concurrency', type=int, default=200)
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds of load per server')
+        parser.add_argument('--timeout', type=float, default=10.0, help='Seconds before a request counts as failed')
+        parser.add_argument('--products', type=int, default=2000, help='Synthetic products to make sure exist')
+        parser.add_argument('--cache', action='store_true',
+                            help='Keep the DRF response cache on (off by default: the async path has none)')
+        parser.add_argument('--wsgi-command', default=(
+            f'{sys.executable} manage.py runserver --noreload 127.0.0.1:{{port}}'
+        ))
+        parser.add_argument('--asgi-command', default=(
+            f'{sys.executable} -m uvicorn Backend.asgi:application --port {{port}} --no-access-log --log-level warning'
+        ))
+
+    def handle(self, *args, **options):
+        if settings.DATABASES['default']['ENGINE'].endswith('sqlite3'):
+            self.stderr.write('Running against SQLite; PostgreSQL gives more representative numbers.')
+        pk = self.ensure_catalog(options['products'])
+        wsgi_path, asgi_path = (path.format(pk=pk) for path in PATHS[options['endpoint']])
+
+        env = dict(os.environ)
+        if not options['cache']:
+            env['CATALOG_CACHE_TIMEOUT'] = '0'
+        for label, command, path in (('WSGI runserver + DRF', options['wsgi_command'], wsgi_path),
+                                     ('ASGI uvicorn + async', options['asgi_command'], asgi_path)):
+            port = free_port()
+            server = subprocess.Popen(command.format(port=port).split(), env=env, cwd=settings.BASE_DIR,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                self.wait_until_up(port, path)
+                latencies, errors, elapsed = asyncio.run(
+                    load(port, path, options['concurrency'], options['duration'], options['timeout'])
+                )
+            finally:
+                server.terminate()
+                server.wait()
+            if not latencies:
+                raise CommandError(f'{label}: every request failed')
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.stdout.write(
+                f'{label:22} {path:32} {len(latencies) / elapsed:8.1f} req/s  '
+                f'p50={statistics.median(latencies) * 1000:7.1f}ms  p99={p99 * 1000:7.1f}ms  errors={errors}'
+            )
+
+    def wait_until_up(self, port, path, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with urlopen(f'http://127.0.0.1:{port}{path}', timeout=5) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'Server on port {port} did not answer {path} within {timeout}s')
+
+    def ensure_catalog(self, count):
+        owner, _ = User.objects.get_or_create(username='bench', defaults={'email': 'bench@example.com'})
+        category, _ = Category.objects.get_or_create(slug='bench-asgi', defaults={'name': 'Bench ASGI'})
+        existing = Product.objects.filter(slug__startswith='bench-asgi-').count()
+        if existing < count:
+            Product.objects.bulk_create(
+                Product(category=category, name=f'Bench product {i:06d}', slug=f'bench-asgi-{i}',
+                        description='Synthetic product for the ASGI benchmark', price=(i % 500) + 0.99,
+                        stock=i % 7, owner=owner)
+                for i in range(existing, count)
+            )
+            facets.rebuild()
+            counters.reconcile()
+            cache.invalidate(cache.CATALOG)
+        return Product.objects.filter(slug__startswith='bench-asgi-', is_active=True).values_list('pk', flat=True)[0]
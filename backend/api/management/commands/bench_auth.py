@@ -0,0 +1,54 @@
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from django.db import connection
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+from api.authentication import CachedJWTAuthentication, forget_user
+
+PATHS = ['/api/cart/', '/api/orders/', '/api/auth/me/']
+
+
+def record_query(queries):
+    # Counts every statement; CaptureQueriesContext loses them to reset_queries() on request_started.
+    def wrapper(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+    return wrapper
+
+
+class Command(BaseCommand):
+    help = "Compare queries and latency per authenticated request with and without the cached JWT user"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help='Timed requests per path')
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username='bench-auth', defaults={'email': 'bench-auth@example.com'})
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        forget_user(user.pk)
+
+        for label, auth_class in (('JWTAuthentication', JWTAuthentication),
+                                  ('CachedJWTAuthentication', CachedJWTAuthentication)):
+            # The viewsets read authentication_classes from APIView, so swapping it there covers them all.
+            with mock.patch.object(APIView, 'authentication_classes', [auth_class]):
+                self.stdout.write(label)
+                for path in PATHS:
+                    client.get(path)  # warm the user cache and any lazily created rows
+                    queries = []
+                    with connection.execute_wrapper(record_query(queries)):
+                        response = client.get(path)
+                    assert response.status_code == 200, (path, response.status_code)
+                    started = time.perf_counter()
+                    for _ in range(options['iterations']):
+                        client.get(path)
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f'  GET {path:16} {len(queries):2} queries, '
+                        f'{elapsed / options["iterations"] * 1000:.2f} ms/request'
+                    )
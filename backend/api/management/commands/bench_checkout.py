@@ -0,0 +1,92 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.db import DatabaseError, close_old_connections, connection
+from rest_framework import serializers
+from api import cache, counters, facets
+from api.models import Cart, CartItem, Category, Order, Product
+from api.serializers import OrderCreateSerializer
+
+
+class Command(BaseCommand):
+    help = "Run parallel checkouts against one hot product and verify stock is never oversold"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--buyers', type=int, default=200, help='Users checking out concurrently')
+        parser.add_argument('--stock', type=int, default=50, help='Units of the hot product on hand')
+        parser.add_argument('--quantity', type=int, default=1, help='Units each buyer orders')
+        parser.add_argument('--workers', type=int, default=16, help='Concurrent checkout threads')
+        parser.add_argument('--retries', type=int, default=5, help='Attempts per checkout on lock errors')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic users and orders')
+
+    def handle(self, *args, **options):
+        if options['workers'] > 1 and connection.vendor == 'sqlite':
+            self.stderr.write('SQLite serializes writers; lock errors are retried with --retries.')
+        owner, _ = User.objects.get_or_create(username='bench', defaults={'email': 'bench@example.com'})
+        category, _ = Category.objects.get_or_create(slug='bench-checkout', defaults={'name': 'Bench checkout'})
+        product, _ = Product.objects.update_or_create(
+            slug='bench-hot-sku',
+            defaults={'category': category, 'name': 'Hot SKU', 'price': 10, 'stock': options['stock'],
+                      'is_active': True, 'owner': owner},
+        )
+        User.objects.filter(username__startswith='bench-buyer-').delete()
+        User.objects.bulk_create(User(username=f'bench-buyer-{i}') for i in range(options['buyers']))
+        buyers = list(User.objects.filter(username__startswith='bench-buyer-'))
+        Cart.objects.bulk_create(Cart(user=user) for user in buyers)
+        carts = Cart.objects.filter(user__in=buyers)
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, product=product, quantity=options['quantity']) for cart in carts
+        )
+
+        def checkout(user):
+            close_old_connections()
+            started = time.perf_counter()
+            outcome = 'error'
+            try:
+                for attempt in range(max(options['retries'], 1)):
+                    serializer = OrderCreateSerializer(data={}, context={'request': SimpleNamespace(user=user)})
+                    serializer.is_valid(raise_exception=True)
+                    try:
+                        serializer.save()
+                    except serializers.ValidationError:
+                        outcome = 'sold_out'
+                        break
+                    except DatabaseError:
+                        time.sleep(0.01 * 2 ** attempt)
+                        continue
+                    outcome = 'ok'
+                    break
+            finally:
+                connection.close()
+            return outcome, (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            results = list(pool.map(checkout, buyers))
+        elapsed = time.perf_counter() - started
+
+        outcomes = [outcome for outcome, _ in results]
+        timings = sorted(ms for _, ms in results)
+        product.refresh_from_db()
+        sold = Order.objects.filter(user__in=buyers).count() * options['quantity']
+        self.stdout.write(
+            f"{outcomes.count('ok')} orders, {outcomes.count('sold_out')} rejected as sold out, "
+            f"{outcomes.count('error')} database errors in {elapsed:.2f}s "
+            f"({len(results) / elapsed:.0f} checkouts/s, p50={timings[len(timings) // 2]:.1f}ms, "
+            f"max={timings[-1]:.1f}ms)"
+        )
+        self.stdout.write(f'Units sold {sold}, stock left {product.stock}, started with {options["stock"]}')
+
+        if not options['keep']:
+            User.objects.filter(username__startswith='bench-buyer-').delete()
+            product.delete()
+            category.delete()
+            facets.rebuild()
+            counters.reconcile()
+            cache.invalidate(cache.CATALOG)
+        if product.stock < 0 or sold + product.stock != options['stock']:
+            raise CommandError('Stock was oversold or lost during the run.')
+        self.stdout.write(self.style.SUCCESS('Checkout benchmark complete; no overselling.'))
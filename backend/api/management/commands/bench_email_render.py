@@ -0,0 +1,52 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from api.emails import build_confirmation
+from api.models import Order, OrderItem, Product
+
+
+class Command(BaseCommand):
+    help = "Benchmark rendering of the order confirmation email for small, medium and huge orders"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', default='1,50,500', help='Comma-separated order sizes to render')
+        parser.add_argument('--iterations', type=int, default=200, help='Timed renders per order size')
+        parser.add_argument('--budget-ms', type=float, help='Fail if any p50 render time exceeds this')
+
+    def order(self, lines):
+        # Unsaved objects with the lines pre-attached, so only template rendering is timed.
+        user = User(username='bench', email='bench@example.com')
+        order = Order(id=1234, user=user, status='paid', created_at=timezone.now())
+        items = [
+            OrderItem(order=order, product=Product(id=i, name=f'Bench product {i}'),
+                      unit_price=Decimal('9.99'), quantity=i % 3 + 1)
+            for i in range(lines)
+        ]
+        order.total_amount = sum(item.subtotal for item in items)
+        order._prefetched_objects_cache = {'items': items}
+        return order
+
+    def handle(self, *args, **options):
+        over_budget = []
+        for lines in [int(size) for size in options['lines'].split(',')]:
+            order = self.order(lines)
+            build_confirmation(order)  # warm the template cache
+            timings = []
+            for _ in range(options['iterations']):
+                started = time.perf_counter()
+                build_confirmation(order)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p50 = statistics.median(timings)
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            self.stdout.write(f'{lines:5} lines: p50={p50:7.3f}ms p99={p99:7.3f}ms')
+            if options['budget_ms'] is not None and p50 > options['budget_ms']:
+                over_budget.append(lines)
+
+        if over_budget:
+            raise CommandError(f"Render time over {options['budget_ms']}ms for {over_budget} line orders.")
+        self.stdout.write(self.style.SUCCESS('Email render benchmark complete.'))
@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from django.db import connection, reset_queries
+from django.test.utils import override_settings
+from api.emails import dispatch_confirmations, due_confirmations
+from api.models import Category, Order, OrderItem, Product
+
+
+class Command(BaseCommand):
+    help = "Measure order confirmation email throughput against the locmem email backend"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=2000)
+        parser.add_argument('--items', type=int, default=5, help='Lines per order')
+        parser.add_argument('--batch-sizes', default='1,100', help='Comma-separated batch sizes to compare')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic users and orders')
+
+    def handle(self, *args, **options):
+        owner, _ = User.objects.get_or_create(username='bench', defaults={'email': 'bench@example.com'})
+        category, _ = Category.objects.get_or_create(slug='bench-emails', defaults={'name': 'Bench emails'})
+        products = [
+            Product.objects.update_or_create(
+                slug=f'bench-email-{i}', defaults={'category': category, 'name': f'Bench item {i}', 'price': 5,
+                                                   'owner': owner})[0]
+            for i in range(options['items'])
+        ]
+        User.objects.filter(username__startswith='bench-mail-').delete()
+        User.objects.bulk_create(
+            User(username=f'bench-mail-{i}', email=f'bench-mail-{i}@example.com') for i in range(options['orders'])
+        )
+        buyers = User.objects.filter(username__startswith='bench-mail-')
+
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', DEBUG=True):
+            for batch_size in [int(size) for size in options['batch_sizes'].split(',')]:
+                Order.objects.filter(user__in=buyers).delete()
+                orders = Order.objects.bulk_create(
+                    Order(user=user, status='paid', total_amount=5 * len(products)) for user in buyers
+                )
+                OrderItem.objects.bulk_create(
+                    OrderItem(order=order, product=product, unit_price=5, quantity=1)
+                    for order in orders for product in products
+                )
+                pending = due_confirmations().filter(user__in=buyers)
+                reset_queries()
+                started = time.perf_counter()
+                sent = batches = 0
+                while True:
+                    stats = dispatch_confirmations(batch_size, orders=pending)
+                    if not stats['sent'] and not stats['failed']:
+                        break
+                    sent += stats['sent']
+                    batches += 1
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'batch size {batch_size:5}: {sent} emails in {batches} batches, {elapsed:.2f}s '
+                    f'({sent / elapsed:.0f} emails/s, {len(connection.queries)} queries)'
+                )
+
+        if not options['keep']:
+            buyers.delete()
+            Product.objects.filter(slug__startswith='bench-email-').delete()
+            category.delete()
+        self.stdout.write(self.style.SUCCESS('Email benchmark complete.'))
@@ -0,0 +1,57 @@
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api import outbox
+from api.models import OutboxMessage
+
+
+class Command(BaseCommand):
+    help = "Measure outbox write cost and publish throughput, separately from the HTTP path"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=5000)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--live', action='store_true',
+                            help='Publish to the configured broker instead of a no-op send_task')
+
+    def handle(self, *args, **options):
+        count = options['messages']
+        if OutboxMessage.objects.exists():
+            self.stderr.write('The outbox is not empty; drain it first (manage.py dispatch_outbox --once).')
+            return
+
+        started = time.perf_counter()
+        for i in range(count):
+            # One transaction per message, as in a checkout.
+            with transaction.atomic():
+                outbox.enqueue('api.tasks.refresh_sales_rollups', coalesce=i % 2 == 0)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'enqueue: {count} messages in {elapsed:.2f}s ({elapsed / count * 1e6:.0f} us/message)')
+
+        patcher = mock.patch.object(outbox, '_publish') if not options['live'] else None
+        if patcher:
+            patcher.start()
+        try:
+            started = time.perf_counter()
+            published = coalesced = batches = 0
+            while True:
+                stats = outbox.publish_pending(options['batch_size'])
+                if stats['failed']:
+                    self.stderr.write('Broker error; see the last_error column in the outbox.')
+                    break
+                if not stats['published'] and not stats['coalesced']:
+                    break
+                published += stats['published']
+                coalesced += stats['coalesced']
+                batches += 1
+            elapsed = time.perf_counter() - started
+        finally:
+            if patcher:
+                patcher.stop()
+        total = published + coalesced
+        self.stdout.write(
+            f"publish ({'live broker' if options['live'] else 'no-op broker'}): {published} published, "
+            f"{coalesced} coalesced in {batches} batches, {elapsed:.2f}s ({total / elapsed:.0f} messages/s)"
+        )
@@ -0,0 +1,103 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from api import cache, counters, facets
+from api.models import CartItem, Category, Product
+from api.search import search_products
+
+
+WORDS = (
+    "wireless bluetooth speaker cotton shirt leather wallet steel bottle organic coffee "
+    "running shoes gaming mouse mechanical keyboard yoga mat ceramic mug linen pillow "
+    "desk lamp phone case travel backpack water filter kitchen knife garden hose "
+    "notebook paperback novel science fiction history cookbook children puzzle"
+).split()
+
+QUERIES = ["wireless speaker", "cotton", "gaming keyboard", "organic coffee", "travel", "novel history", "mug"]
+
+# Slug prefix of every row this benchmark creates, and the only rows it deletes.
+PREFIX = 'bench-search-'
+
+
+class Command(BaseCommand):
+    help = "Benchmark /api/products/search/ queries against a synthetic catalog"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1_000_000, help='Synthetic products to generate')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--iterations', type=int, default=50, help='Timed runs per query')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic catalog after the run')
+
+    def handle(self, *args, **options):
+        owner, _ = User.objects.get_or_create(username='bench', defaults={'email': 'bench@example.com'})
+        categories = [
+            Category.objects.get_or_create(slug=f'{PREFIX}{i}', defaults={'name': f'Bench search {i}'})[0]
+            for i in range(20)
+        ]
+
+        existing = Product.objects.filter(slug__startswith=PREFIX).count()
+        to_create = max(options['products'] - existing, 0)
+        self.stdout.write(f'Generating {to_create} products ({existing} already present)...')
+        rng = random.Random(42)
+        started = time.perf_counter()
+        batch = []
+        for i in range(existing, existing + to_create):
+            words = rng.sample(WORDS, 6)
+            batch.append(Product(
+                category=categories[i % len(categories)],
+                name=f"{' '.join(words[:3]).title()} {i}",
+                slug=f'{PREFIX}{i}',
+                description=' '.join(words),
+                price=rng.randint(100, 50000) / 100,
+                stock=rng.randint(0, 100),
+                owner=owner,
+            ))
+            if len(batch) >= options['batch_size']:
+                Product.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Product.objects.bulk_create(batch)
+        facets.rebuild()
+        counters.reconcile()
+        cache.invalidate(cache.CATALOG)
+        self.stdout.write(f'Catalog ready in {time.perf_counter() - started:.1f}s')
+
+        base = Product.objects.filter(is_active=True)
+        for query in QUERIES:
+            timings = []
+            for _ in range(options['iterations']):
+                started = time.perf_counter()
+                results = search_products(base, query).order_by('-search_rank', 'id')
+                results.count()
+                list(results[:24])
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            self.stdout.write(
+                f'{query!r:20} p50={statistics.median(timings):7.2f}ms p99={p99:7.2f}ms'
+            )
+
+        if not options['keep']:
+            self.delete_catalog(options['batch_size'])
+            facets.rebuild()
+            counters.reconcile()
+            cache.invalidate(cache.CATALOG)
+        self.stdout.write(self.style.SUCCESS('Search benchmark complete.'))
+
+    def delete_catalog(self, batch_size):
+        """
+        Delete the synthetic products in id batches with plain DELETEs. Going through
+        Model.delete() would fire the facet, counter and cache signals once per row,
+        and the caller rebuilds those tables right after anyway.
+        """
+        products = Product.objects.filter(slug__startswith=PREFIX)
+        while True:
+            ids = list(products.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            CartItem.objects.filter(product_id__in=ids)._raw_delete(CartItem.objects.db)
+            Product.objects.filter(pk__in=ids)._raw_delete(Product.objects.db)
+        Category.objects.filter(slug__startswith=PREFIX).delete()
@@ -0,0 +1,89 @@
+import statistics
+import threading
+import time
+
+from celery import Celery
+from django.core.management.base import BaseCommand
+from Backend.celery import app as project_app
+
+LONG_TASK = 'api.tasks.refresh_sales_rollups'
+SHORT_TASK = 'api.tasks.process_order_payment'
+
+
+class Command(BaseCommand):
+    help = (
+        "Show how the queue topology keeps short tasks from waiting behind long ones, "
+        "using an in-memory broker and in-process consumers"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--long', type=int, default=8, help='Long tasks queued first')
+        parser.add_argument('--long-seconds', type=float, default=0.5)
+        parser.add_argument('--short', type=int, default=20, help='Short tasks queued behind them')
+        parser.add_argument('--concurrency', type=int, default=2, help='Consumer threads per worker')
+
+    def handle(self, *args, **options):
+        for label, routed in (('single queue', False), ('routed', True)):
+            waits, elapsed = self.run(routed, options)
+            self.stdout.write(
+                f'{label:12}: short task wait p50 {statistics.median(waits) * 1000:7.1f} ms, '
+                f'max {max(waits) * 1000:7.1f} ms; all tasks done in {elapsed:.2f}s'
+            )
+
+    def run(self, routed, options):
+        app = Celery('bench', broker='memory://', set_as_current=False)
+        app.conf.update(
+            task_default_queue=project_app.conf.task_default_queue,
+            task_queues=project_app.conf.task_queues,
+            task_routes=project_app.conf.task_routes if routed else {},
+            task_ignore_result=True,
+        )
+        waits = []
+        long_seconds = options['long_seconds']
+
+        # Stand-ins registered under the real task names, so the real routes apply.
+        @app.task(name=LONG_TASK)
+        def long_task():
+            time.sleep(long_seconds)
+
+        @app.task(name=SHORT_TASK)
+        def short_task(sent_at):
+            waits.append(time.perf_counter() - sent_at)
+
+        started = time.perf_counter()
+        for _ in range(options['long']):
+            long_task.delay()
+        for _ in range(options['short']):
+            short_task.delay(time.perf_counter())
+
+        default = app.conf.task_default_queue
+        queues = [queue.name for queue in app.conf.task_queues]
+        # Routed: one worker for checkout follow-ups and one for the rest, as in docker-compose.
+        groups = [[default], [q for q in queues if q != default]] if routed else [queues]
+        pending = options['long'] + options['short']
+        remaining = [pending]
+        lock = threading.Lock()
+
+        def consume(names):
+            # A worker process with prefetch 1: take one message, run it, take the next.
+            with app.connection_for_read() as conn:
+                channel = conn.default_channel
+                while remaining[0]:
+                    message = next(filter(None, (channel.basic_get(name, no_ack=True) for name in names)), None)
+                    if message is None:
+                        time.sleep(0.001)
+                        continue
+                    args, kwargs, _ = message.decode()
+                    app.tasks[message.headers['task']](*args, **kwargs)
+                    with lock:
+                        remaining[0] -= 1
+
+        threads = [
+            threading.Thread(target=consume, args=(names,))
+            for names in groups for _ in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return waits, time.perf_counter() - started
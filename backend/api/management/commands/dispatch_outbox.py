@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api import outbox
+
+
+class Command(BaseCommand):
+    help = "Publish outbox messages to the Celery broker, polling until interrupted"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the outbox once and exit')
+        parser.add_argument('--batch-size', type=int, default=None, help='Default: OUTBOX_BATCH_SIZE')
+        parser.add_argument('--interval', type=float, default=None, help='Idle poll interval in seconds')
+
+    def handle(self, *args, **options):
+        interval = options['interval'] if options['interval'] is not None else settings.OUTBOX_POLL_INTERVAL
+        while True:
+            stats = outbox.publish_pending(options['batch_size'])
+            if stats['published'] or stats['coalesced'] or stats['failed']:
+                self.stdout.write(
+                    f"published {stats['published']}, coalesced {stats['coalesced']}, failed {stats['failed']}"
+                )
+            # A full batch means more is probably waiting; a broker error backs off.
+            busy = (stats['published'] + stats['coalesced']) and not stats['failed']
+            if options['once'] and not busy:
+                return
+            if not busy:
+                time.sleep(interval)
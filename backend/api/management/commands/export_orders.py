@@ -0,0 +1,28 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from api import exports
+from api.models import Order
+
+
+class Command(BaseCommand):
+    help = "Stream every order line as NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=exports.EXPORT_FORMATS, default='ndjson')
+        parser.add_argument('--output', help='Destination file (defaults to stdout)')
+        parser.add_argument('--chunk-size', type=int, default=exports.DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--status', choices=[code for code, _ in Order.STATUS_CHOICES],
+                            help='Only export lines of orders in this status')
+
+    def handle(self, *args, **options):
+        blocks = exports.render(
+            exports.order_item_rows(options['chunk_size'], status=options['status']),
+            exports.ORDER_ITEM_COLUMNS,
+            options['format'],
+        )
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as out:
+                out.writelines(blocks)
+        else:
+            sys.stdout.writelines(blocks)
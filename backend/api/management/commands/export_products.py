@@ -0,0 +1,23 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from api import exports
+
+
+class Command(BaseCommand):
+    help = "Stream every product as NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=exports.EXPORT_FORMATS, default='ndjson')
+        parser.add_argument('--output', help='Destination file (defaults to stdout)')
+        parser.add_argument('--chunk-size', type=int, default=exports.DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        blocks = exports.render(
+            exports.product_rows(options['chunk_size']), exports.PRODUCT_COLUMNS, options['format']
+        )
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as out:
+                out.writelines(blocks)
+        else:
+            sys.stdout.writelines(blocks)
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from api.importers import IMPORT_FORMATS, ProductImportError, detect_format, import_products, read_rows
+
+
+class Command(BaseCommand):
+    help = "Stream products from a CSV or JSONL file and upsert them by slug in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with a header row) or JSONL file')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--owner', default='admin', help='Username that owns newly created products')
+        parser.add_argument('--no-create-categories', action='store_true',
+                            help='Skip rows whose category does not exist instead of creating it')
+
+    def handle(self, *args, **options):
+        try:
+            owner = User.objects.get(username=options['owner'])
+        except User.DoesNotExist:
+            raise CommandError(f"Owner {options['owner']!r} does not exist")
+
+        started = time.perf_counter()
+        try:
+            fmt = options['format'] or detect_format(options['path'])
+            with open(options['path'], newline='', encoding='utf-8') as stream:
+                stats = import_products(
+                    read_rows(stream, fmt),
+                    owner,
+                    batch_size=options['batch_size'],
+                    create_categories=not options['no_create_categories'],
+                )
+        except (OSError, ProductImportError) as exc:
+            raise CommandError(str(exc))
+
+        for error in stats['errors']:
+            self.stderr.write(error)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['imported']} of {stats['rows']} rows in {stats['batches']} batches "
+            f"({stats['skipped']} skipped, {stats['categories_created']} categories created) in {elapsed:.1f}s."
+        ))
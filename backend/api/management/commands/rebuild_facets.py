@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from api import facets
+
+
+class Command(BaseCommand):
+    help = "Recompute the catalog facet summary table from Product"
+
+    def handle(self, *args, **options):
+        buckets = facets.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Facet counts rebuilt ({buckets} buckets).'))
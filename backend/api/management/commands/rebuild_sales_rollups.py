@@ -0,0 +1,15 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from api import rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily sales rollup tables from Order/OrderItem"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=date.fromisoformat, help='First day to rebuild (YYYY-MM-DD); default all')
+
+    def handle(self, *args, **options):
+        days = rollups.rebuild(since=options['since'])
+        self.stdout.write(self.style.SUCCESS(f'Sales rollups rebuilt for {days} days.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from api import cache, counters
+
+
+class Command(BaseCommand):
+    help = "Recompute Category.product_count for categories whose counter has drifted"
+
+    def handle(self, *args, **options):
+        repaired = counters.reconcile()
+        if repaired:
+            cache.invalidate(cache.CATALOG)
+        self.stdout.write(self.style.SUCCESS(f'Category counters reconciled ({repaired} repaired).'))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.19 on 2026-10-18 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'name', 'id'], name='product_active_name_id_idx'),
+        ),
+    ]
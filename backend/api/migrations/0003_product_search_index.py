@@ -0,0 +1,126 @@
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    "ALTER TABLE api_product ADD COLUMN search_vector tsvector",
+    """
+    CREATE FUNCTION api_product_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(
+                (SELECT name FROM api_category WHERE id = NEW.category_id), ''
+            )), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER api_product_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description, category_id ON api_product
+    FOR EACH ROW EXECUTE FUNCTION api_product_search_vector_update()
+    """,
+    """
+    CREATE FUNCTION api_category_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        IF NEW.name IS DISTINCT FROM OLD.name THEN
+            UPDATE api_product SET name = name WHERE category_id = NEW.id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER api_category_search_vector_trigger
+    AFTER UPDATE OF name ON api_category
+    FOR EACH ROW EXECUTE FUNCTION api_category_search_vector_update()
+    """,
+    "UPDATE api_product SET name = name",
+    "CREATE INDEX product_search_vector_idx ON api_product USING GIN (search_vector)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP TRIGGER IF EXISTS api_category_search_vector_trigger ON api_category",
+    "DROP FUNCTION IF EXISTS api_category_search_vector_update()",
+    "DROP TRIGGER IF EXISTS api_product_search_vector_trigger ON api_product",
+    "DROP FUNCTION IF EXISTS api_product_search_vector_update()",
+    "DROP INDEX IF EXISTS product_search_vector_idx",
+    "ALTER TABLE api_product DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE api_product_fts USING fts5(
+        name, category_name, description, tokenize = 'porter unicode61'
+    )
+    """,
+    # Weight name over category over description in the built-in rank column.
+    "INSERT INTO api_product_fts(api_product_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)')",
+    """
+    CREATE TRIGGER api_product_fts_insert AFTER INSERT ON api_product BEGIN
+        INSERT INTO api_product_fts(rowid, name, category_name, description)
+        VALUES (
+            new.id, new.name,
+            (SELECT name FROM api_category WHERE id = new.category_id),
+            new.description
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER api_product_fts_delete AFTER DELETE ON api_product BEGIN
+        DELETE FROM api_product_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER api_product_fts_update AFTER UPDATE OF name, description, category_id ON api_product BEGIN
+        DELETE FROM api_product_fts WHERE rowid = old.id;
+        INSERT INTO api_product_fts(rowid, name, category_name, description)
+        VALUES (
+            new.id, new.name,
+            (SELECT name FROM api_category WHERE id = new.category_id),
+            new.description
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER api_category_fts_update AFTER UPDATE OF name ON api_category BEGIN
+        UPDATE api_product_fts SET category_name = new.name
+        WHERE rowid IN (SELECT id FROM api_product WHERE category_id = new.id);
+    END
+    """,
+    """
+    INSERT INTO api_product_fts(rowid, name, category_name, description)
+    SELECT p.id, p.name, c.name, p.description
+    FROM api_product p JOIN api_category c ON c.id = p.category_id
+    """,
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS api_category_fts_update",
+    "DROP TRIGGER IF EXISTS api_product_fts_update",
+    "DROP TRIGGER IF EXISTS api_product_fts_delete",
+    "DROP TRIGGER IF EXISTS api_product_fts_insert",
+    "DROP TABLE IF EXISTS api_product_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_product_active_name_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRES_REVERSE, 'sqlite': SQLITE_REVERSE}),
+        ),
+    ]
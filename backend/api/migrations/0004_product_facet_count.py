@@ -0,0 +1,48 @@
+# Generated by Django 4.2.19 on 2026-10-18 19:18
+
+from bisect import bisect_right
+from decimal import Decimal
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# The default CATALOG_PRICE_BANDS when this migration was written. Deployments with
+# other bands run `manage.py rebuild_facets` after migrating.
+PRICE_BANDS = [Decimal('25'), Decimal('50'), Decimal('100'), Decimal('250'), Decimal('500')]
+
+
+def backfill_facet_counts(apps, schema_editor):
+    Product = apps.get_model('api', 'Product')
+    ProductFacetCount = apps.get_model('api', 'ProductFacetCount')
+    counts = {}
+    for row in Product.objects.filter(is_active=True).values('category_id', 'price', 'stock').iterator():
+        key = (row['category_id'], bisect_right(PRICE_BANDS, row['price']), row['stock'] > 0)
+        counts[key] = counts.get(key, 0) + 1
+    ProductFacetCount.objects.bulk_create([
+        ProductFacetCount(category_id=category_id, price_band=band, in_stock=in_stock, count=count)
+        for (category_id, band, in_stock), count in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductFacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price_band', models.PositiveSmallIntegerField()),
+                ('in_stock', models.BooleanField()),
+                ('count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facet_counts', to='api.category')),
+            ],
+            options={
+                'unique_together': {('category', 'price_band', 'in_stock')},
+            },
+        ),
+        migrations.RunPython(backfill_facet_counts, migrations.RunPython.noop),
+    ]
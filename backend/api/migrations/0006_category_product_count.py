@@ -0,0 +1,91 @@
+# Generated by Django 4.2.19 on 2026-10-18 19:24
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+# SQLite implements ALTER TABLE for most schema changes by rebuilding the table,
+# which drops triggers on it and fails on triggers that reference it, so the FTS
+# triggers from 0003 are dropped around the new column and recreated after it.
+SQLITE_FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER api_product_fts_insert AFTER INSERT ON api_product BEGIN
+        INSERT INTO api_product_fts(rowid, name, category_name, description)
+        VALUES (
+            new.id, new.name,
+            (SELECT name FROM api_category WHERE id = new.category_id),
+            new.description
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER api_product_fts_delete AFTER DELETE ON api_product BEGIN
+        DELETE FROM api_product_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER api_product_fts_update AFTER UPDATE OF name, description, category_id ON api_product BEGIN
+        DELETE FROM api_product_fts WHERE rowid = old.id;
+        INSERT INTO api_product_fts(rowid, name, category_name, description)
+        VALUES (
+            new.id, new.name,
+            (SELECT name FROM api_category WHERE id = new.category_id),
+            new.description
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER api_category_fts_update AFTER UPDATE OF name ON api_category BEGIN
+        UPDATE api_product_fts SET category_name = new.name
+        WHERE rowid IN (SELECT id FROM api_product WHERE category_id = new.id);
+    END
+    """,
+]
+
+SQLITE_DROP_FTS_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS api_category_fts_update",
+    "DROP TRIGGER IF EXISTS api_product_fts_update",
+    "DROP TRIGGER IF EXISTS api_product_fts_delete",
+    "DROP TRIGGER IF EXISTS api_product_fts_insert",
+]
+
+
+def drop_sqlite_fts_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in SQLITE_DROP_FTS_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+def create_sqlite_fts_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in SQLITE_FTS_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+def backfill_product_counts(apps, schema_editor):
+    Category = apps.get_model('api', 'Category')
+    Product = apps.get_model('api', 'Product')
+    active = (
+        Product.objects.filter(category=OuterRef('pk'), is_active=True)
+        .order_by().values('category').annotate(total=Count('id')).values('total')
+    )
+    Category.objects.update(product_count=Coalesce(Subquery(active, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_catalog_updated_at_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_sqlite_fts_triggers, create_sqlite_fts_triggers),
+        migrations.AddField(
+            model_name='category',
+            name='product_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(create_sqlite_fts_triggers, drop_sqlite_fts_triggers),
+        migrations.RunPython(backfill_product_counts, migrations.RunPython.noop),
+    ]
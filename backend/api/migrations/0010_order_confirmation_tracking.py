@@ -0,0 +1,35 @@
+# Generated by Django 4.2.19 on 2026-10-18 19:40
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_orders_confirmed(apps, schema_editor):
+    # Orders placed before batching were emailed by the old per-order task.
+    Order = apps.get_model('api', 'Order')
+    Order.objects.update(confirmation_sent_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='confirmation_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='confirmation_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_existing_orders_confirmed, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('confirmation_sent_at__isnull', True), ('status', 'paid')), fields=['id'], name='order_confirmation_due_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.19 on 2026-10-18 20:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_outbox_message'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='confirmation_claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.19 on 2026-10-18 20:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_order_confirmation_claim'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='payment_claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.19 on 2026-10-18 20:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_order_payment_claim'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'price', 'id'], name='product_active_price_id_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 
 
 class TimeStampedModel(models.Model):
@@ -14,9 +16,15 @@ class Category(TimeStampedModel):
     name = models.CharField(max_length=120, unique=True)
     slug = models.SlugField(max_length=140, unique=True)
     description = models.TextField(blank=True)
+    # Active products in this category; maintained by signals.py, repaired by
+    # `manage.py reconcile_category_counts`.
+    product_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["updated_at"], name="category_updated_at_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -36,10 +44,40 @@ class Product(TimeStampedModel):
     class Meta:
         ordering = ["name"]
         unique_together = ("category", "name")
+        indexes = [
+            models.Index(fields=["is_active", "name", "id"], name="product_active_name_id_idx"),
+            models.Index(fields=["is_active", "price", "id"], name="product_active_price_id_idx"),
+            models.Index(fields=["updated_at"], name="product_updated_at_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Denormalized catalog data is maintained by signal handlers (see signals.py);
+        # run them in the same transaction as the row change.
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            return super().delete(*args, **kwargs)
+
+
+class ProductFacetCount(models.Model):
+    """Active product count per (category, price band, stock state) bucket."""
+
+    category = models.ForeignKey(Category, related_name="facet_counts", on_delete=models.CASCADE)
+    price_band = models.PositiveSmallIntegerField()
+    in_stock = models.BooleanField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("category", "price_band", "in_stock")
+
+    def __str__(self) -> str:
+        return f"{self.category_id}/{self.price_band}/{self.in_stock}: {self.count}"
+
 
 class Cart(TimeStampedModel):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, related_name="cart", on_delete=models.CASCADE)
@@ -47,10 +85,93 @@ class Cart(TimeStampedModel):
     def __str__(self) -> str:
         return f"Cart({self.user})"
 
+    def _prefetched_items(self):
+        return getattr(self, "_prefetched_objects_cache", {}).get("items")
+
+    def summary(self) -> dict:
+        """Item count and subtotal, from prefetched items when present, else one aggregate query."""
+        items = self._prefetched_items()
+        if items is not None:
+            return {
+                "item_count": sum(item.quantity for item in items),
+                "total_amount": sum(item.subtotal for item in items),
+            }
+        totals = self.items.aggregate(
+            item_count=models.Sum("quantity"),
+            total_amount=models.Sum(
+                models.F("quantity") * models.F("product__price"),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
+        return {"item_count": totals["item_count"] or 0, "total_amount": totals["total_amount"] or 0}
+
     @property
     def total_amount(self):
-        total = sum(item.subtotal for item in self.items.all())
-        return total
+        return self.summary()["total_amount"]
+
+    @property
+    def item_count(self):
+        return self.summary()["item_count"]
+
+    def add_product(self, product_id, quantity: int) -> None:
+        """Increment a line in the database, creating it if the cart doesn't have it yet."""
+        if self.items.filter(product_id=product_id).update(
+            quantity=models.F("quantity") + quantity, updated_at=timezone.now()
+        ):
+            return
+        try:
+            with transaction.atomic():
+                self.items.create(product_id=product_id, quantity=quantity)
+        except IntegrityError:
+            # A concurrent request created the line first; increment it instead.
+            self.items.filter(product_id=product_id).update(
+                quantity=models.F("quantity") + quantity, updated_at=timezone.now()
+            )
+
+    @transaction.atomic
+    def apply_changes(self, increments: dict, quantities: dict) -> None:
+        """
+        Apply folded edits in a fixed number of statements. ``quantities`` maps
+        product id to an absolute quantity (0 removes the line); ``increments``
+        maps product id to a quantity to add.
+        """
+        removed = [product_id for product_id, quantity in quantities.items() if quantity == 0]
+        if removed:
+            self.items.filter(product_id__in=removed).delete()
+
+        kept = [
+            CartItem(cart=self, product_id=product_id, quantity=quantity)
+            for product_id, quantity in quantities.items() if quantity > 0
+        ]
+        if kept:
+            CartItem.objects.bulk_create(
+                kept, update_conflicts=True, unique_fields=["cart", "product"], update_fields=["quantity", "updated_at"]
+            )
+
+        if not increments:
+            return
+        existing = set(self.items.filter(product_id__in=increments).values_list("product_id", flat=True))
+        if existing:
+            self.items.filter(product_id__in=existing).update(
+                quantity=models.F("quantity") + models.Case(
+                    *[models.When(product_id=product_id, then=models.Value(increments[product_id]))
+                      for product_id in existing],
+                    output_field=models.PositiveIntegerField(),
+                ),
+                updated_at=timezone.now(),
+            )
+        missing = [product_id for product_id in increments if product_id not in existing]
+        if not missing:
+            return
+        try:
+            with transaction.atomic():
+                CartItem.objects.bulk_create(
+                    [CartItem(cart=self, product_id=product_id, quantity=increments[product_id])
+                     for product_id in missing]
+                )
+        except IntegrityError:
+            for product_id in missing:
+                self.add_product(product_id, increments[product_id])
 
 
 class CartItem(TimeStampedModel):
@@ -82,6 +203,26 @@ class Order(TimeStampedModel):
     total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     payment_reference = models.CharField(max_length=120, blank=True)
     shipping_address = models.TextField(blank=True)
+    # Lease held by whoever is charging the order (api.payments.claim).
+    payment_claimed_until = models.DateTimeField(null=True, blank=True)
+    # Confirmation email bookkeeping for api.emails.dispatch_confirmations.
+    confirmation_sent_at = models.DateTimeField(null=True, blank=True)
+    confirmation_attempts = models.PositiveSmallIntegerField(default=0)
+    confirmation_claimed_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "created_at", "id"], name="order_user_created_idx"),
+            # Only paid orders still waiting for their email, so the dispatcher's scan stays tiny.
+            models.Index(
+                fields=["id"],
+                condition=models.Q(status="paid", confirmation_sent_at__isnull=True),
+                name="order_confirmation_due_idx",
+            ),
+            # Sales rollups find changed orders by updated_at and rebuild whole days by created_at.
+            models.Index(fields=["updated_at"], name="order_updated_at_idx"),
+            models.Index(fields=["created_at"], name="order_created_at_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Order #{self.pk} - {self.user} - {self.status}"
@@ -97,3 +238,91 @@ class OrderItem(TimeStampedModel):
     def subtotal(self):
         return self.unit_price * self.quantity
 
+
+class IdempotencyKey(models.Model):
+    """Response of a completed POST, replayed when the client retries with the same key."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="idempotency_keys", on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    # sha256 of the request body, so a reused key with a different payload is rejected.
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ("user", "key")
+
+    def __str__(self) -> str:
+        return f"{self.user_id}/{self.key}"
+
+
+class DailySales(models.Model):
+    """Paid orders per day, maintained by api.rollups."""
+
+    day = models.DateField(unique=True)
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ["day"]
+
+    def __str__(self) -> str:
+        return f"{self.day}: {self.orders} orders, {self.revenue}"
+
+
+class DailyProductSales(models.Model):
+    """Paid order lines per (day, product), maintained by api.rollups."""
+
+    day = models.DateField()
+    product = models.ForeignKey(Product, related_name="daily_sales", on_delete=models.CASCADE)
+    # The product's category when the day was rolled up, so category totals need no join.
+    category = models.ForeignKey(Category, related_name="daily_sales", on_delete=models.CASCADE)
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ("day", "product")
+        indexes = [
+            models.Index(fields=["category", "day"], name="daily_product_sales_cat_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day}/{self.product_id}: {self.units} units"
+
+
+class RollupWatermark(models.Model):
+    """How far (by ``Order.updated_at``) a rollup job has consumed orders."""
+
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DateTimeField()
+
+    def __str__(self) -> str:
+        return f"{self.name} @ {self.value.isoformat()}"
+
+
+class OutboxMessage(models.Model):
+    """
+    A Celery task written in the same transaction as the change that needs it and
+    published to the broker afterwards by api.outbox. Rows are deleted once published.
+    """
+
+    task = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    # Earliest time the task should run (Celery ``eta``); null means immediately.
+    run_at = models.DateTimeField(null=True, blank=True)
+    # Identical coalescing messages in one publish batch are sent once.
+    coalesce = models.BooleanField(default=False)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self) -> str:
+        return f"{self.task}{tuple(self.args)}"
@@ -0,0 +1,74 @@
+import json
+import logging
+from datetime import timedelta
+
+from celery import current_app
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(task: str, args=(), kwargs=None, countdown: float = None, coalesce: bool = False) -> OutboxMessage:
+    """
+    Record ``task`` for publishing. Call it inside the transaction whose commit should
+    trigger the task: the message commits or rolls back with it, and the request
+    never waits on the broker.
+    """
+    return OutboxMessage.objects.create(
+        task=task,
+        args=list(args),
+        kwargs=kwargs or {},
+        run_at=timezone.now() + timedelta(seconds=countdown) if countdown else None,
+        coalesce=coalesce,
+    )
+
+
+def _publish(message: OutboxMessage) -> None:
+    current_app.send_task(message.task, args=message.args, kwargs=message.kwargs, eta=message.run_at)
+
+
+def publish_pending(limit: int = None) -> dict:
+    """
+    Publish up to ``limit`` outbox messages in id order and delete them.
+
+    Rows are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED``, so several
+    dispatchers can run side by side. Delivery is at least once: a crash
+    between publishing and commit republishes the batch. The first broker error
+    ends the batch, because the rest would almost certainly fail too. That
+    message keeps its row with the error recorded and is retried next round.
+    """
+    limit = limit or settings.OUTBOX_BATCH_SIZE
+    stats = {"published": 0, "coalesced": 0, "failed": 0}
+    with transaction.atomic():
+        batch = list(OutboxMessage.objects.select_for_update(skip_locked=True).order_by("id")[:limit])
+        done, seen = [], set()
+        for message in batch:
+            if message.coalesce:
+                key = (message.task, json.dumps(message.args), json.dumps(message.kwargs, sort_keys=True))
+                if key in seen:
+                    done.append(message.pk)
+                    stats["coalesced"] += 1
+                    continue
+                seen.add(key)
+            try:
+                _publish(message)
+            except Exception as exc:
+                logger.warning("Could not publish outbox message %s (%s): %s", message.pk, message.task, exc)
+                message.attempts += 1
+                message.last_error = str(exc)[:1000]
+                message.save(update_fields=["attempts", "last_error"])
+                stats["failed"] += 1
+                break
+            done.append(message.pk)
+            stats["published"] += 1
+        if done:
+            OutboxMessage.objects.filter(pk__in=done).delete()
+    return stats
+
+
+def backlog() -> int:
+    return OutboxMessage.objects.count()
@@ -0,0 +1,48 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ProductCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the catalog ordering: (name, id) by default, or by
+    price with ``?ordering=price`` / ``?ordering=-price``.
+
+    Each page is a range scan on the (is_active, name, id) or (is_active, price,
+    id) index, so deep pages cost the same as the first one.
+    """
+
+    ordering = ("name", "id")
+    orderings = {
+        "name": ("name", "id"),
+        "price": ("price", "id"),
+        "-price": ("-price", "-id"),
+    }
+    ordering_query_param = "ordering"
+    page_size = 24
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        key = request.query_params.get(self.ordering_query_param)
+        if not key:
+            return self.ordering
+        if key not in self.orderings:
+            raise ValidationError({self.ordering_query_param: f"Expected one of {', '.join(self.orderings)}."})
+        return self.orderings[key]
+
+
+class ProductSearchPagination(PageNumberPagination):
+    """Search results are ordered by relevance, so they page by number rather than by key."""
+
+    page_size = 24
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class OrderCursorPagination(CursorPagination):
+    """Newest orders first; each page is a range scan on the (user, created_at, id) index."""
+
+    ordering = ("-created_at", "-id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
@@ -0,0 +1,122 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import inventory, outbox
+from .models import Order
+
+
+class PaymentError(Exception):
+    """The provider declined the charge; the order should be marked failed."""
+
+
+class StubPaymentProvider:
+    """
+    Local stand-in for a real gateway. A charge takes PAYMENT_STUB_LATENCY
+    seconds, so the async checkout path can be exercised with realistic timing,
+    and is declined only when there is nothing to charge.
+    """
+
+    def charge(self, order) -> str:
+        if settings.PAYMENT_STUB_LATENCY:
+            time.sleep(settings.PAYMENT_STUB_LATENCY)
+        if order.total_amount <= 0:
+            raise PaymentError(f"Order {order.pk} has nothing to charge")
+        return f"mock_{order.pk}"
+
+
+PROVIDERS = {
+    "stub": StubPaymentProvider,
+}
+
+_instances = {}
+
+
+def get_payment_provider():
+    name = settings.PAYMENT_PROVIDER
+    if name not in _instances:
+        _instances[name] = PROVIDERS[name]()
+    return _instances[name]
+
+
+def claim(order_id):
+    """
+    Lease a pending order to the caller for PAYMENT_CLAIM_TIMEOUT seconds and return
+    it, or None when it is settled or another worker holds an unexpired lease. The
+    lease is a single UPDATE, so it commits on its own before the charge starts.
+    """
+    now = timezone.now()
+    claimed = Order.objects.filter(
+        Q(payment_claimed_until__isnull=True) | Q(payment_claimed_until__lt=now), pk=order_id, status="pending"
+    ).update(payment_claimed_until=now + timedelta(seconds=settings.PAYMENT_CLAIM_TIMEOUT))
+    if not claimed:
+        return None
+    return Order.objects.select_related("user").get(pk=order_id)
+
+
+def release_claim(order) -> None:
+    """Give up the lease without settling, so a retry can claim the order at once."""
+    Order.objects.filter(pk=order.pk).update(payment_claimed_until=None)
+
+
+def charge(order):
+    """
+    Run ``order``'s charge through the provider; returns the payment reference,
+    or None when it is declined. Call it outside any transaction, so no row
+    lock is held while the provider answers. Other provider errors propagate.
+    """
+    try:
+        return get_payment_provider().charge(order)
+    except PaymentError:
+        return None
+
+
+def record(order, reference) -> bool:
+    """
+    Store the outcome of charge(): paid with ``reference``, or failed with the
+    reserved stock put back. Call inside a transaction. An order that was settled
+    in the meantime is left as it is.
+    """
+    current = Order.objects.select_for_update().only("status").get(pk=order.pk)
+    if current.status != "pending":
+        order.status = current.status
+        return current.status == "paid"
+    order.payment_claimed_until = None
+    if reference is None:
+        order.status = "failed"
+        order.save(update_fields=["status", "payment_claimed_until", "updated_at"])
+        inventory.release(dict(order.items.values_list("product_id", "quantity")))
+        return False
+    order.status = "paid"
+    order.payment_reference = reference
+    order.save(update_fields=["status", "payment_reference", "payment_claimed_until", "updated_at"])
+    return True
+
+
+def reap_stale(limit: int = 100) -> int:
+    """
+    Queue process_order_payment again for orders left pending for longer than
+    PAYMENT_PENDING_TIMEOUT with no live lease, e.g. because the process died
+    between charge() and record(), or a payment task was lost. Each order found is
+    touched so the next run skips it until the timeout passes again. Providers
+    charge an order at most once (the reference is keyed by order), so charging
+    again is safe. Returns the number of orders queued.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        stale = list(
+            Order.objects.filter(
+                Q(payment_claimed_until__isnull=True) | Q(payment_claimed_until__lt=now),
+                status="pending",
+                updated_at__lt=now - timedelta(seconds=settings.PAYMENT_PENDING_TIMEOUT),
+            ).order_by("id").select_for_update(skip_locked=True).values_list("pk", flat=True)[:limit]
+        )
+        if stale:
+            Order.objects.filter(pk__in=stale).update(updated_at=now)
+            for pk in stale:
+                outbox.enqueue("api.tasks.process_order_payment", args=[pk])
+    return len(stale)
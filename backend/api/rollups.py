@@ -0,0 +1,146 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyProductSales, DailySales, Order, OrderItem, RollupWatermark
+
+
+SALES = "sales"
+COUNTED_STATUSES = ("paid",)
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+DAYS_PER_BATCH = 31
+
+
+def _created_on(days, prefix="") -> Q:
+    """Index-friendly ``created_at`` ranges covering the given local days."""
+    q = Q()
+    for day in days:
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        q |= Q(**{f"{prefix}created_at__gte": start, f"{prefix}created_at__lt": start + timedelta(days=1)})
+    return q
+
+
+@transaction.atomic
+def rebuild_days(days) -> int:
+    """Recompute both rollup tables for ``days`` from the orders placed on them."""
+    days = sorted(set(days))
+    if not days:
+        return 0
+    DailySales.objects.filter(day__in=days).delete()
+    DailyProductSales.objects.filter(day__in=days).delete()
+
+    line_revenue = ExpressionWrapper(
+        F("unit_price") * F("quantity"), output_field=DecimalField(max_digits=14, decimal_places=2)
+    )
+    lines = (
+        OrderItem.objects.filter(_created_on(days, "order__"), order__status__in=COUNTED_STATUSES)
+        .annotate(day=TruncDate("order__created_at"))
+        .values("day", "product_id", "product__category_id")
+        .annotate(orders=Count("order_id", distinct=True), units=Sum("quantity"), revenue=Sum(line_revenue))
+        .order_by()
+    )
+    totals = {}
+    products = []
+    for row in lines:
+        products.append(DailyProductSales(
+            day=row["day"],
+            product_id=row["product_id"],
+            category_id=row["product__category_id"],
+            orders=row["orders"],
+            units=row["units"],
+            revenue=row["revenue"],
+        ))
+        day = totals.setdefault(row["day"], DailySales(day=row["day"]))
+        day.units += row["units"]
+        day.revenue += row["revenue"]
+    DailyProductSales.objects.bulk_create(products, batch_size=1000)
+
+    orders = (
+        Order.objects.filter(_created_on(days), status__in=COUNTED_STATUSES)
+        .annotate(day=TruncDate("created_at"))
+        .values("day")
+        .annotate(orders=Count("id"))
+        .order_by()
+    )
+    for row in orders:
+        totals.setdefault(row["day"], DailySales(day=row["day"])).orders = row["orders"]
+    DailySales.objects.bulk_create(totals.values())
+    return len(days)
+
+
+def refresh() -> int:
+    """
+    Roll up every day that has an order changed since the watermark, then move the
+    watermark forward.
+
+    A day is always rebuilt whole, so the job is idempotent, and a status change
+    (pending -> paid, paid -> cancelled) lands in the day the order was placed.
+    The watermark trails the clock by SALES_ROLLUP_LAG seconds. That lag covers
+    transactions that stamped ``updated_at`` but had not yet committed when the job
+    ran. Anything later than that is repaired by ``manage.py rebuild_sales_rollups``.
+    Returns the number of days rebuilt.
+    """
+    until = timezone.now() - timedelta(seconds=settings.SALES_ROLLUP_LAG)
+    with transaction.atomic():
+        # The row lock keeps two overlapping runs from rolling up the same window.
+        mark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=SALES, defaults={"value": EPOCH})
+        if until <= mark.value:
+            return 0
+        days = sorted(set(
+            Order.objects.filter(updated_at__gt=mark.value, updated_at__lte=until)
+            .annotate(day=TruncDate("created_at"))
+            .values_list("day", flat=True)
+            .order_by()
+        ))
+        for start in range(0, len(days), DAYS_PER_BATCH):
+            rebuild_days(days[start:start + DAYS_PER_BATCH])
+        mark.value = until
+        mark.save(update_fields=["value"])
+    return len(days)
+
+
+def rebuild(since=None) -> int:
+    """Recompute every day from ``since`` (a date; default: the first order) onwards."""
+    orders = Order.objects.order_by()
+    if since is not None:
+        orders = orders.filter(created_at__gte=timezone.make_aware(datetime.combine(since, time.min)))
+    days = sorted(set(orders.annotate(day=TruncDate("created_at")).values_list("day", flat=True)))
+    with transaction.atomic():
+        for model in (DailySales, DailyProductSales):
+            stale = model.objects.all()
+            if since is not None:
+                stale = stale.filter(day__gte=since)
+            stale.delete()
+        for start in range(0, len(days), DAYS_PER_BATCH):
+            rebuild_days(days[start:start + DAYS_PER_BATCH])
+    return len(days)
+
+
+REPORT_GROUPS = ("day", "product", "category")
+
+
+def sales_report(group: str, start, end, limit: int = 50) -> dict:
+    """Revenue, units and orders between two dates (inclusive), read only from the rollups."""
+    days = DailySales.objects.filter(day__gte=start, day__lte=end)
+    totals = days.aggregate(orders=Sum("orders"), units=Sum("units"), revenue=Sum("revenue"))
+    if group == "day":
+        rows = days.values("day", "orders", "units", "revenue")
+    else:
+        sums = {"orders": Sum("orders"), "units": Sum("units"), "revenue": Sum("revenue")}
+        rows = (
+            DailyProductSales.objects.filter(day__gte=start, day__lte=end)
+            .values(f"{group}_id", name=F(f"{group}__name"))
+            .annotate(**sums)
+            .order_by("-revenue", f"{group}_id")[:limit]
+        )
+    return {
+        "group": group,
+        "start": start,
+        "end": end,
+        "totals": {key: value or 0 for key, value in totals.items()},
+        "results": list(rows),
+    }
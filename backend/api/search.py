@@ -0,0 +1,64 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+
+# The index itself lives in the database (see migration 0003): a trigger-maintained
+# ``search_vector`` tsvector column with a GIN index on Postgres, and an FTS5 shadow
+# table ``api_product_fts`` on SQLite. This module only builds the query side.
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _fts5_match_expression(query: str) -> str:
+    # Quote every token so user input can never be parsed as FTS5 syntax; the last
+    # token is a prefix match to support search-as-you-type.
+    tokens = _TOKEN_RE.findall(query)
+    if not tokens:
+        return ""
+    quoted = ['"%s"' % token for token in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search_products(queryset, query: str):
+    """
+    Restrict a Product queryset to rows matching ``query`` and annotate each row
+    with ``search_rank`` (higher is more relevant).
+    """
+    table = queryset.model._meta.db_table
+    vendor = connections[queryset.db].vendor
+
+    if vendor == "postgresql":
+        tsquery = "websearch_to_tsquery('english', %s)"
+        match = RawSQL(f"{table}.search_vector @@ {tsquery}", [query], output_field=BooleanField())
+        rank = RawSQL(f"ts_rank_cd({table}.search_vector, {tsquery})", [query], output_field=FloatField())
+        return queryset.filter(match).annotate(search_rank=rank)
+
+    if vendor == "sqlite":
+        expression = _fts5_match_expression(query)
+        if not expression:
+            # Nothing to match, but keep the annotation callers order by.
+            return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+        # Join the FTS table rather than correlating per row, so SQLite runs the
+        # MATCH once. FTS5's rank is bm25, where lower is better; negate it so
+        # both backends sort by ``-search_rank``.
+        return queryset.extra(
+            tables=[f"{table}_fts"],
+            where=[f"{table}_fts.rowid = {table}.id", f"{table}_fts MATCH %s"],
+            params=[expression],
+            select={"search_rank": f"-{table}_fts.rank"},
+        )
+
+    # No full-text index on other backends: substring matches, ranked by the
+    # field they hit in the same name > category > description order.
+    return queryset.filter(
+        Q(name__icontains=query) | Q(category__name__icontains=query) | Q(description__icontains=query)
+    ).annotate(search_rank=Case(
+        When(name__icontains=query, then=Value(3.0)),
+        When(category__name__icontains=query, then=Value(2.0)),
+        default=Value(1.0),
+        output_field=FloatField(),
+    ))
@@ -1,17 +1,43 @@
+from datetime import timedelta
+
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from django.db import transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 from .models import Category, Product, Cart, CartItem, Order, OrderItem
+from . import inventory, rollups
+from .cart_store import get_cart_store
 
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ["id", "name", "slug", "description", "created_at", "updated_at"]
-
-
-class ProductSerializer(serializers.ModelSerializer):
+        fields = ["id", "name", "slug", "description", "product_count", "created_at", "updated_at"]
+        read_only_fields = ["product_count", "created_at", "updated_at"]
+
+
+class SparseFieldsMixin:
+    """
+    Trims the serialized fields on reads with ``?fields=id,name`` (keep only these)
+    and ``?omit=description`` (drop these).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        params = request.query_params
+        keep = {name for name in params.get("fields", "").split(",") if name}
+        omit = {name for name in params.get("omit", "").split(",") if name}
+        for name in list(self.fields):
+            if (keep and name not in keep) or name in omit:
+                self.fields.pop(name)
+
+
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source="owner.username")
     category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all())
 
@@ -33,6 +59,14 @@ class ProductSerializer(serializers.ModelSerializer):
         ]
 
 
+class ProductListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Compact product card for grid views (``?view=compact``)."""
+
+    class Meta:
+        model = Product
+        fields = ["id", "category", "name", "slug", "image_url", "price"]
+
+
 class CartItemSerializer(serializers.ModelSerializer):
     product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.filter(is_active=True))
     product_name = serializers.ReadOnlyField(source="product.name")
@@ -57,17 +91,65 @@ class CartItemSerializer(serializers.ModelSerializer):
 
 class CartSerializer(serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
+    item_count = serializers.SerializerMethodField()
     total_amount = serializers.SerializerMethodField()
 
     class Meta:
         model = Cart
-        fields = ["id", "user", "items", "total_amount", "created_at", "updated_at"]
-        read_only_fields = ["user", "items", "total_amount", "created_at", "updated_at"]
+        fields = ["id", "user", "items", "item_count", "total_amount", "created_at", "updated_at"]
+        read_only_fields = ["user", "items", "item_count", "total_amount", "created_at", "updated_at"]
+
+    def get_item_count(self, obj):
+        return obj.item_count
 
     def get_total_amount(self, obj):
         return obj.total_amount
 
 
+class CartOperationSerializer(serializers.Serializer):
+    OPS = ("add", "set", "remove")
+
+    op = serializers.ChoiceField(choices=OPS)
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0, required=False)
+
+    def validate(self, attrs):
+        if attrs["op"] == "add" and attrs.get("quantity", 1) < 1:
+            raise serializers.ValidationError({"quantity": "Must be at least 1 when adding."})
+        if attrs["op"] == "set" and "quantity" not in attrs:
+            raise serializers.ValidationError({"quantity": "This field is required when setting."})
+        return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+    operations = CartOperationSerializer(many=True, allow_empty=False)
+
+    def validate_operations(self, operations):
+        product_ids = {operation["product"] for operation in operations}
+        found = set(Product.objects.filter(pk__in=product_ids, is_active=True).values_list("pk", flat=True))
+        missing = sorted(product_ids - found)
+        if missing:
+            raise serializers.ValidationError(f"Unknown or inactive products: {missing}")
+        return operations
+
+    @staticmethod
+    def fold(operations):
+        """Collapse the ordered operations into per-product increments and absolute quantities."""
+        increments, quantities = {}, {}
+        for operation in operations:
+            product_id = operation["product"]
+            if operation["op"] == "add":
+                quantity = operation.get("quantity", 1)
+                if product_id in quantities:
+                    quantities[product_id] += quantity
+                else:
+                    increments[product_id] = increments.get(product_id, 0) + quantity
+            else:
+                increments.pop(product_id, None)
+                quantities[product_id] = operation.get("quantity", 0) if operation["op"] == "set" else 0
+        return increments, quantities
+
+
 class OrderItemSerializer(serializers.ModelSerializer):
     product = serializers.PrimaryKeyRelatedField(read_only=True)
     product_name = serializers.ReadOnlyField(source="product.name")
@@ -110,13 +192,33 @@ class OrderSerializer(serializers.ModelSerializer):
         read_only_fields = ["user", "status", "total_amount", "payment_reference", "created_at", "updated_at"]
 
 
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """Order history row without line items; ``item_count`` is annotated by the view."""
+
+    item_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ["id", "status", "total_amount", "payment_reference", "item_count", "created_at", "updated_at"]
+        read_only_fields = fields
+
+
 class OrderCreateSerializer(serializers.Serializer):
+    """
+    Snapshots the cart into a ``pending`` order and reserves its stock. Charging
+    is left to the caller, after this transaction has committed (see
+    OrderViewSet.create and the process_order_payment task).
+    """
+
     shipping_address = serializers.CharField(allow_blank=True, required=False)
 
     @transaction.atomic
     def create(self, validated_data):
         request = self.context["request"]
         user = request.user
+        # With a write-behind cart store the latest cart may only be in Redis.
+        store = get_cart_store()
+        store.flush(user.pk, force=True)
         cart, _ = Cart.objects.get_or_create(user=user)
         items = list(cart.items.select_related("product"))
         if not items:
@@ -125,31 +227,43 @@ class OrderCreateSerializer(serializers.Serializer):
         order = Order.objects.create(
             user=user,
             status="pending",
-            total_amount=0,
+            total_amount=sum(item.product.price * item.quantity for item in items),
             shipping_address=validated_data.get("shipping_address", ""),
         )
-        total = 0
-        for item in items:
-            OrderItem.objects.create(
-                order=order,
-                product=item.product,
-                unit_price=item.product.price,
-                quantity=item.quantity,
-            )
-            total += item.product.price * item.quantity
-
-        order.total_amount = total
-        # Mock payment success
-        order.status = "paid"
-        order.payment_reference = f"mock_{order.id}"
-        order.save()
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product=item.product, unit_price=item.product.price, quantity=item.quantity)
+            for item in items
+        )
 
         # Clear cart
         cart.items.all().delete()
-
+        transaction.on_commit(lambda: store.clear(user.pk))
+
+        # Reserve last: the stock row locks are held until commit, so keep that window short.
+        try:
+            inventory.reserve({item.product_id: item.quantity for item in items})
+        except inventory.InsufficientStock as exc:
+            name = next(item.product.name for item in items if item.product_id == exc.product_id)
+            raise serializers.ValidationError({"stock": f"Not enough stock for {name}"})
         return order
 
 
+class SalesReportQuerySerializer(serializers.Serializer):
+    """Query parameters of /api/analytics/sales/; the window defaults to the last 30 days."""
+
+    group = serializers.ChoiceField(choices=rollups.REPORT_GROUPS, default="day")
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=500, default=50)
+
+    def validate(self, attrs):
+        attrs.setdefault("end", timezone.localdate())
+        attrs.setdefault("start", attrs["end"] - timedelta(days=29))
+        if attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError({"start": "Must not be after end."})
+        return attrs
+
+
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
@@ -0,0 +1,72 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import authentication, cache, counters, facets
+from .models import Category, Product
+
+
+_TRACKED_FIELDS = ("category_id", "price", "stock", "is_active")
+
+
+def _state(product) -> dict:
+    return {field: getattr(product, field) for field in _TRACKED_FIELDS}
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_product_state(sender, instance, raw=False, **kwargs):
+    # Denormalized catalog data is adjusted by delta, so handlers need the row as
+    # it was before this save.
+    previous = None
+    if instance.pk and not raw:
+        previous = Product.objects.filter(pk=instance.pk).values(*_TRACKED_FIELDS).first()
+    instance._previous_state = previous
+
+
+@receiver(post_save, sender=Product)
+def update_facets_on_product_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_state", None)
+    old_key = facets.facet_key(**previous) if previous else None
+    new_key = facets.facet_key(**_state(instance))
+    if old_key != new_key:
+        facets.apply_delta(old_key, -1)
+        facets.apply_delta(new_key, 1)
+
+
+@receiver(post_delete, sender=Product)
+def update_facets_on_product_delete(sender, instance, **kwargs):
+    facets.apply_delta(facets.facet_key(**_state(instance)), -1)
+
+
+@receiver(post_save, sender=Product)
+def update_category_count_on_product_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_state", None)
+    old = counters.counted_category(previous["category_id"], previous["is_active"]) if previous else None
+    counters.apply_move(old, counters.counted_category(instance.category_id, instance.is_active))
+
+
+@receiver(post_delete, sender=Product)
+def update_category_count_on_product_delete(sender, instance, **kwargs):
+    counters.apply_move(counters.counted_category(instance.category_id, instance.is_active), None)
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_catalog_cache(sender, **kwargs):
+    # Bump now so this process stops serving the old entries, and again after
+    # commit so a reader that cached the pre-commit state in between is orphaned.
+    cache.invalidate(cache.CATALOG)
+    transaction.on_commit(lambda: cache.invalidate(cache.CATALOG))
+
+
+@receiver([post_save, post_delete], sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    # Same double invalidation as the catalog: a request that cached the old row
+    # between the save and the commit is dropped again once the change is visible.
+    authentication.forget_user(instance.pk)
+    transaction.on_commit(lambda: authentication.forget_user(instance.pk))
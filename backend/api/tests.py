@@ -1,7 +1,21 @@
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from django.contrib.auth.models import User
-from .models import Category, Product, Cart, CartItem, Order
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from . import cart_store, throttling
+from .cart_store import RedisCartStore
+from .models import Category, Product, ProductFacetCount, Cart, CartItem, Order, OrderItem, OutboxMessage
 
 
 class EcommerceFlowTests(APITestCase):
@@ -43,4 +57,1150 @@ class EcommerceFlowTests(APITestCase):
         self.assertEqual(res.status_code, 201)
         self.assertEqual(res.data['status'], 'paid')
 
-# Create your tests here.
+
+class ProductPaginationTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        self.cat = Category.objects.create(name='Cat', slug='cat')
+        for i in range(30):
+            Product.objects.create(
+                category=self.cat, name=f'P{i:02d}', slug=f'p{i:02d}', price='1.00', owner=self.admin
+            )
+
+    def test_cursor_pages_cover_catalog_in_order(self):
+        names = []
+        url = '/api/products/?page_size=7'
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, 200)
+            names.extend(p['name'] for p in res.data['results'])
+            url = res.data['next']
+        self.assertEqual(names, [f'P{i:02d}' for i in range(30)])
+
+    def test_cursor_pages_follow_price_ordering(self):
+        for i, product in enumerate(Product.objects.order_by('name')):
+            Product.objects.filter(pk=product.pk).update(price=i % 4)
+        expected = list(Product.objects.order_by('-price', '-id').values_list('id', flat=True))
+        ids, url = [], '/api/products/?page_size=7&ordering=-price'
+        while url:
+            res = self.client.get(url)
+            ids.extend(p['id'] for p in res.data['results'])
+            url = res.data['next']
+        self.assertEqual(ids, expected)
+        self.assertEqual(self.client.get('/api/products/', {'ordering': 'stock'}).status_code, 400)
+
+
+class ProductSearchTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        self.books = Category.objects.create(name='Books', slug='books')
+        self.audio = Category.objects.create(name='Audio', slug='audio')
+        Product.objects.create(category=self.audio, name='Wireless Speaker', slug='speaker', price='50.00',
+                               description='Portable bluetooth speaker', owner=self.admin)
+        Product.objects.create(category=self.books, name='Speaker Handbook', slug='handbook', price='20.00',
+                               description='A guide to public speaking', owner=self.admin)
+        Product.objects.create(category=self.books, name='Cookbook', slug='cookbook', price='15.00', owner=self.admin)
+
+    def test_search_ranks_name_matches_and_follows_category_renames(self):
+        res = self.client.get('/api/products/search/', {'q': 'bluetooth'})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([p['slug'] for p in res.data['results']], ['speaker'])
+
+        res = self.client.get('/api/products/search/', {'q': 'books'})
+        self.assertEqual({p['slug'] for p in res.data['results']}, {'handbook', 'cookbook'})
+
+        self.books.name = 'Literature'
+        self.books.save()
+        res = self.client.get('/api/products/search/', {'q': 'literature'})
+        self.assertEqual(res.data['count'], 2)
+
+    def test_search_requires_query(self):
+        res = self.client.get('/api/products/search/')
+        self.assertEqual(res.status_code, 400)
+
+    def test_query_without_words_finds_nothing(self):
+        res = self.client.get('/api/products/search/', {'q': '***'})
+        self.assertEqual((res.status_code, res.data['count']), (200, 0))
+
+    def test_other_backends_fall_back_to_substring_match(self):
+        from api.search import search_products
+        with mock.patch.object(connection, 'vendor', 'mysql'):
+            results = search_products(Product.objects.all(), 'book').order_by('-search_rank', 'id')
+            self.assertEqual([p.slug for p in results], ['handbook', 'cookbook'])
+
+
+class ProductFacetTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        self.books = Category.objects.create(name='Books', slug='books')
+        self.audio = Category.objects.create(name='Audio', slug='audio')
+        self.novel = Product.objects.create(category=self.books, name='Novel', slug='novel', price='10.00',
+                                            stock=5, owner=self.admin)
+        Product.objects.create(category=self.books, name='Atlas', slug='atlas', price='80.00', stock=0,
+                               owner=self.admin)
+        Product.objects.create(category=self.audio, name='Speaker', slug='speaker', price='300.00', stock=2,
+                               owner=self.admin)
+
+    def facets(self, **params):
+        res = self.client.get('/api/products/', params)
+        self.assertEqual(res.status_code, 200)
+        return res.data
+
+    def test_filters_and_disjunctive_counts(self):
+        data = self.facets(category=self.books.id, in_stock='true')
+        self.assertEqual([p['slug'] for p in data['results']], ['novel'])
+        categories = {c['slug']: c['count'] for c in data['facets']['category']}
+        self.assertEqual(categories, {'books': 1, 'audio': 1})
+        stock = {s['value']: s['count'] for s in data['facets']['in_stock']}
+        self.assertEqual(stock, {True: 1, False: 1})
+
+        data = self.facets(price_band='0')
+        self.assertEqual([p['slug'] for p in data['results']], ['novel'])
+        labels = {b['band']: b['label'] for b in data['facets']['price_band']}
+        self.assertEqual(labels[0], '0-25')
+        for band in ('99', '-1'):
+            self.assertEqual(self.client.get('/api/products/', {'price_band': band}).status_code, 400)
+
+    def test_counts_follow_product_changes(self):
+        self.novel.category = self.audio
+        self.novel.save()
+        Product.objects.get(slug='atlas').delete()
+        counts = {c['slug']: c['count'] for c in self.facets()['facets']['category']}
+        self.assertEqual(counts, {'audio': 2})
+
+        from api import facets
+        before = list(ProductFacetCount.objects.values_list('category_id', 'price_band', 'in_stock', 'count'))
+        facets.rebuild()
+        after = list(ProductFacetCount.objects.values_list('category_id', 'price_band', 'in_stock', 'count'))
+        self.assertEqual(sorted(c for c in before if c[3]), sorted(after))
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        self.cat = Category.objects.create(name='Cat', slug='cat')
+        self.product = Product.objects.create(category=self.cat, name='P1', slug='p1', price='1.00',
+                                              owner=self.admin)
+
+    def assertRevalidates(self, url, change):
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        etag = res['ETag']
+        self.assertTrue(res.has_header('Last-Modified'))
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res['ETag'], etag)
+
+        change()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_product_list_and_detail(self):
+        def rename():
+            self.product.name = 'P1 renamed'
+            self.product.save()
+
+        self.assertRevalidates('/api/products/', rename)
+        self.assertRevalidates(f'/api/products/{self.product.id}/', rename)
+        self.assertRevalidates('/api/products/', lambda: Product.objects.filter(pk=self.product.pk).delete())
+
+    def test_category_list(self):
+        self.assertRevalidates('/api/categories/', lambda: Category.objects.create(name='Other', slug='other'))
+
+    def test_category_detail_follows_product_count(self):
+        url = f'/api/categories/{self.cat.id}/'
+        self.assertRevalidates(url, lambda: Product.objects.create(category=self.cat, name='P2', slug='p2',
+                                                                   price='1.00', owner=self.admin))
+        self.assertEqual(self.client.get(url).data['product_count'], 2)
+
+    def test_not_modified_skips_serialization(self):
+        etag = self.client.get('/api/products/')['ETag']
+        cache.clear()
+        with self.assertNumQueries(2):
+            res = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        self.cat = Category.objects.create(name='Cat', slug='cat')
+        self.product = Product.objects.create(category=self.cat, name='P1', slug='p1', price='1.00',
+                                              owner=self.admin)
+
+    def test_hits_are_served_without_queries_and_writes_invalidate(self):
+        url = f'/api/products/{self.product.id}/'
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            res = self.client.get(url)
+        self.assertEqual(res['X-Cache'], 'HIT')
+        self.assertEqual(res.data['name'], 'P1')
+
+        self.product.name = 'P2'
+        self.product.save()
+        res = self.client.get(url)
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['name'], 'P2')
+
+        self.cat.description = 'changed'
+        self.cat.save()
+        self.assertEqual(self.client.get('/api/products/')['X-Cache'], 'MISS')
+
+    def test_revalidation_hit_returns_304(self):
+        etag = self.client.get('/api/categories/')['ETag']
+        with self.assertNumQueries(0):
+            res = self.client.get('/api/categories/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+    def test_stats_are_staff_only(self):
+        self.client.get('/api/categories/')
+        self.client.get('/api/categories/')
+        self.client.force_authenticate(self.admin)
+        res = self.client.get('/api/cache/stats/')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual((res.data['hits'], res.data['misses']), (1, 1))
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        self.cat = Category.objects.create(name='Cat', slug='cat')
+        self.product = Product.objects.create(category=self.cat, name='P1', slug='p1', price='1.00',
+                                              description='long text', owner=self.admin)
+
+    def test_fields_and_omit(self):
+        res = self.client.get('/api/products/', {'fields': 'id,name,owner'})
+        self.assertEqual(list(res.data['results'][0]), ['id', 'name', 'owner'])
+        self.assertEqual(res.data['results'][0]['owner'], 'admin1')
+
+        res = self.client.get(f'/api/products/{self.product.id}/', {'omit': 'description,owner'})
+        self.assertNotIn('description', res.data)
+        self.assertNotIn('owner', res.data)
+        self.assertIn('price', res.data)
+
+    def test_compact_view_defers_unused_columns(self):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get('/api/products/', {'view': 'compact'})
+        self.assertEqual(
+            set(res.data['results'][0]), {'id', 'category', 'name', 'slug', 'image_url', 'price'}
+        )
+        product_query = next(q['sql'] for q in ctx.captured_queries if '"api_product"."slug"' in q['sql'])
+        self.assertNotIn('"description"', product_query)
+        self.assertNotIn('auth_user', product_query)
+
+
+class ProductImportTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        self.user = User.objects.create_user(username='u1', password='pass')
+        self.cat = Category.objects.create(name='Books', slug='books')
+        Product.objects.create(category=self.cat, name='Old', slug='novel', price='5.00', owner=self.admin)
+
+    def upload(self, name, content):
+        return self.client.post('/api/products/import/', {'file': SimpleUploadedFile(name, content.encode())},
+                                format='multipart')
+
+    def test_csv_upsert_by_slug_in_batches(self):
+        self.client.force_authenticate(self.admin)
+        res = self.client.post('/api/products/import/', {
+            'file': SimpleUploadedFile('products.csv', (
+                'slug,name,category,price,stock\n'
+                'novel,Novel,books,12.50,3\n'
+                'speaker,Speaker,Audio,80,0\n'
+                'broken,Broken,books,not-a-price,1\n'
+                'lamp,Lamp,Home,20,4\n'
+            ).encode()),
+            'batch_size': 2,
+        }, format='multipart')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual((res.data['imported'], res.data['skipped'], res.data['batches']), (3, 1, 2))
+        self.assertEqual(res.data['categories_created'], 2)
+        novel = Product.objects.get(slug='novel')
+        self.assertEqual((novel.name, str(novel.price), novel.stock), ('Novel', '12.50', 3))
+        self.assertEqual(Product.objects.get(slug='speaker').category.slug, 'audio')
+        counts = {c['slug']: c['count'] for c in self.client.get('/api/products/').data['facets']['category']}
+        self.assertEqual(counts, {'books': 1, 'audio': 1, 'home': 1})
+
+    def test_jsonl_import_and_admin_only(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.upload('p.jsonl', '{}').status_code, 403)
+        self.client.force_authenticate(self.admin)
+        res = self.upload('p.jsonl', '{"slug": "atlas", "name": "Atlas", "category": "Books", "price": "9"}\n\n')
+        self.assertEqual(res.data['imported'], 1)
+        self.assertTrue(Product.objects.filter(slug='atlas', category=self.cat).exists())
+
+    def test_bad_rows_are_skipped_and_reported_not_fatal(self):
+        self.client.force_authenticate(self.admin)
+        lines = [
+            '[1, 2]',
+            '{"slug": "dup", "name": "Old", "category": "books", "price": "1"}',
+            '{"slug": "long", "name": "%s", "category": "books", "price": "1"}' % ('x' * 201),
+            '{"slug": "rich", "name": "Rich", "category": "books", "price": "100000000"}',
+            '{"slug": "ok", "name": "Fine", "category": "books", "price": "3"}',
+        ]
+        res = self.upload('p.jsonl', '\n'.join(lines))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual((res.data['imported'], res.data['skipped']), (1, 4))
+        self.assertEqual([error.split(':')[0] for error in res.data['errors']],
+                         ['line 1', 'line 3', 'line 4', 'line 2'])
+        self.assertEqual(sorted(Product.objects.values_list('slug', flat=True)), ['novel', 'ok'])
+        self.cat.refresh_from_db()
+        self.assertEqual(self.cat.product_count, 2)
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        self.user = User.objects.create_user(username='u1', password='pass')
+        self.cat = Category.objects.create(name='Books', slug='books')
+        self.product = Product.objects.create(category=self.cat, name='Novel', slug='novel', price='12.50',
+                                              owner=self.admin)
+        order = Order.objects.create(user=self.user, status='paid', total_amount='25.00')
+        OrderItem.objects.create(order=order, product=self.product, unit_price='12.50', quantity=2)
+
+    def test_streams_ndjson_and_csv(self):
+        self.client.force_authenticate(self.admin)
+        res = self.client.get('/api/products/export/')
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(res.streaming_content).decode().splitlines()]
+        self.assertEqual([(r['slug'], r['category'], r['price']) for r in rows], [('novel', 'books', '12.50')])
+
+        res = self.client.get('/api/orders/export/', {'output': 'csv'})
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:2], ['order_id', 'order_status'])
+        self.assertEqual(lines[1].split(',')[-2:], ['12.50', '2'])
+
+    def test_exports_are_admin_only(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/orders/export/').status_code, 403)
+
+
+class CategoryCounterTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        self.books = Category.objects.create(name='Books', slug='books')
+        self.audio = Category.objects.create(name='Audio', slug='audio')
+
+    def counts(self):
+        return dict(Category.objects.values_list('slug', 'product_count'))
+
+    def test_counters_follow_create_move_deactivate_delete(self):
+        p = Product.objects.create(category=self.books, name='N', slug='n', price='1.00', owner=self.admin)
+        Product.objects.create(category=self.books, name='M', slug='m', price='1.00', owner=self.admin)
+        self.assertEqual(self.counts(), {'books': 2, 'audio': 0})
+        p.category = self.audio
+        p.save()
+        self.assertEqual(self.counts(), {'books': 1, 'audio': 1})
+        p.is_active = False
+        p.save()
+        self.assertEqual(self.counts(), {'books': 1, 'audio': 0})
+        Product.objects.get(slug='m').delete()
+        self.assertEqual(self.counts(), {'books': 0, 'audio': 0})
+
+        res = self.client.get('/api/categories/')
+        self.assertEqual({c['slug']: c['product_count'] for c in res.data}, {'books': 0, 'audio': 0})
+
+    def test_reconcile_repairs_drift(self):
+        Product.objects.create(category=self.books, name='N', slug='n', price='1.00', owner=self.admin)
+        Category.objects.update(product_count=7)
+        call_command('reconcile_category_counts', stdout=io.StringIO())
+        self.assertEqual(self.counts(), {'books': 1, 'audio': 0})
+
+
+class CartQueryCountTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        self.user = User.objects.create_user(username='u1', password='pass')
+        self.cat = Category.objects.create(name='Cat', slug='cat')
+        self.products = [
+            Product.objects.create(category=self.cat, name=f'P{i}', slug=f'p{i}', price='2.50', owner=self.admin)
+            for i in range(12)
+        ]
+        self.client.force_authenticate(self.user)
+
+    def cart_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get('/api/cart/')
+        self.assertEqual(res.status_code, 200)
+        return len(ctx.captured_queries), res.data
+
+    def test_cart_views_are_constant_in_cart_size(self):
+        self.client.post('/api/cart/add/', {'product': self.products[0].id, 'quantity': 2}, format='json')
+        small, data = self.cart_queries()
+        self.assertEqual((data['item_count'], data['total_amount']), (2, Decimal('5.00')))
+
+        for product in self.products[1:]:
+            self.client.post('/api/cart/add/', {'product': product.id, 'quantity': 1}, format='json')
+        large, data = self.cart_queries()
+        self.assertEqual(small, large)
+        self.assertEqual((data['item_count'], data['total_amount']), (13, Decimal('32.50')))
+
+        cart = Cart.objects.get(user=self.user)
+        self.assertEqual(cart.summary(), {'item_count': 13, 'total_amount': Decimal('32.50')})
+
+
+class CartBatchTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        self.user = User.objects.create_user(username='u1', password='pass')
+        self.cat = Category.objects.create(name='Cat', slug='cat')
+        self.p1, self.p2, self.p3 = [
+            Product.objects.create(category=self.cat, name=f'P{i}', slug=f'p{i}', price='1.00', owner=self.admin)
+            for i in range(3)
+        ]
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/cart/add/', {'product': self.p1.id, 'quantity': 2}, format='json')
+        self.client.post('/api/cart/add/', {'product': self.p3.id, 'quantity': 1}, format='json')
+
+    def test_batch_applies_operations_in_order(self):
+        res = self.client.post('/api/cart/batch/', {'operations': [
+            {'op': 'add', 'product': self.p1.id, 'quantity': 3},
+            {'op': 'add', 'product': self.p2.id},
+            {'op': 'set', 'product': self.p2.id, 'quantity': 4},
+            {'op': 'add', 'product': self.p2.id, 'quantity': 1},
+            {'op': 'remove', 'product': self.p3.id},
+        ]}, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual({i['product']: i['quantity'] for i in res.data['items']}, {self.p1.id: 5, self.p2.id: 5})
+        self.assertEqual(res.data['item_count'], 10)
+
+    def test_invalid_batch_changes_nothing(self):
+        res = self.client.post('/api/cart/batch/', {'operations': [
+            {'op': 'add', 'product': self.p2.id, 'quantity': 1},
+            {'op': 'add', 'product': 999, 'quantity': 1},
+        ]}, format='json')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(CartItem.objects.filter(cart__user=self.user).count(), 2)
+
+
+class FakeRedis:
+    """Just enough of redis-py (decode_responses=True) for RedisCartStore."""
+
+    def __init__(self):
+        self.hashes, self.sets = {}, {}
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hsetnx(self, key, field, value):
+        self.hashes.setdefault(key, {}).setdefault(field, str(value))
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = str(value)
+
+    def hincrby(self, key, field, amount):
+        fields = self.hashes.setdefault(key, {})
+        fields[field] = str(int(fields.get(field, 0)) + amount)
+
+    def hdel(self, key, field):
+        self.hashes.get(key, {}).pop(field, None)
+
+    def exists(self, key):
+        return int(key in self.hashes)
+
+    def expire(self, key, seconds):
+        pass
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+    def sadd(self, key, member):
+        members = self.sets.setdefault(key, set())
+        added = str(member) not in members
+        members.add(str(member))
+        return int(added)
+
+    def srem(self, key, member):
+        members = self.sets.get(key, set())
+        removed = str(member) in members
+        members.discard(str(member))
+        return int(removed)
+
+    def srandmember(self, key, count):
+        return list(self.sets.get(key, set()))[:count]
+
+    def pipeline(self):
+        client = self
+
+        class Pipeline:
+            def __init__(self):
+                self.calls = []
+
+            def __getattr__(self, name):
+                return lambda *args: self.calls.append((name, args))
+
+            def execute(self):
+                return [getattr(client, name)(*args) for name, args in self.calls]
+
+        return Pipeline()
+
+
+@override_settings(CART_STORE='redis')
+class RedisCartStoreTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        self.user = User.objects.create_user(username='u1', password='pass')
+        self.cat = Category.objects.create(name='Cat', slug='cat')
+        self.p1, self.p2 = [
+            Product.objects.create(category=self.cat, name=f'P{i}', slug=f'p{i}', price='3.00', stock=10,
+                                   owner=self.admin)
+            for i in range(2)
+        ]
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.p1, quantity=1)
+        self.store = RedisCartStore(client=FakeRedis())
+        patcher = mock.patch.dict(cart_store._instances, {'redis': self.store})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_authenticate(self.user)
+
+    def test_mutations_stay_in_redis_until_flushed(self):
+        with mock.patch('api.tasks.flush_cart.apply_async') as schedule:
+            self.client.post('/api/cart/add/', {'product': self.p1.id, 'quantity': 2}, format='json')
+            res = self.client.post('/api/cart/add/', {'product': self.p2.id, 'quantity': 1}, format='json')
+        schedule.assert_called_once()
+        self.assertEqual({i['product']: i['quantity'] for i in res.data['items']}, {self.p1.id: 3, self.p2.id: 1})
+        self.assertEqual(res.data['total_amount'], Decimal('12.00'))
+        self.assertEqual(list(CartItem.objects.values_list('product_id', 'quantity')), [(self.p1.id, 1)])
+
+        self.store.flush(self.user.id)
+        self.assertEqual(
+            dict(CartItem.objects.values_list('product_id', 'quantity')), {self.p1.id: 3, self.p2.id: 1}
+        )
+
+    def test_checkout_flushes_and_clears(self):
+        with mock.patch('api.tasks.flush_cart.apply_async'):
+            self.client.post('/api/cart/add/', {'product': self.p2.id, 'quantity': 2}, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post('/api/orders/', {'shipping_address': 'addr'}, format='json')
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(len(res.data['items']), 2)
+        self.assertEqual(self.client.get('/api/cart/').data['items'], [])
+
+    def test_failed_flush_keeps_the_cart_dirty(self):
+        with mock.patch('api.tasks.flush_cart.apply_async'):
+            self.client.post('/api/cart/add/', {'product': self.p2.id, 'quantity': 2}, format='json')
+        with mock.patch.object(Cart, 'apply_changes', side_effect=OSError('db down')):
+            with self.assertLogs('api.cart_store', 'ERROR'):
+                self.assertEqual(self.store.flush_dirty(), 0)
+        self.assertEqual(self.store.flush_dirty(), 1)
+        self.assertEqual(
+            dict(CartItem.objects.values_list('product_id', 'quantity')), {self.p1.id: 1, self.p2.id: 2}
+        )
+        self.assertEqual(self.store.flush_dirty(), 0)
+
+    def test_flush_drops_lines_for_deleted_products(self):
+        with mock.patch('api.tasks.flush_cart.apply_async'):
+            self.client.post('/api/cart/add/', {'product': self.p2.id, 'quantity': 2}, format='json')
+        self.p2.delete()
+        self.store.flush(self.user.id, force=True)
+        self.assertEqual(list(CartItem.objects.values_list('product_id', 'quantity')), [(self.p1.id, 1)])
+
+
+class InventoryReservationTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        self.user = User.objects.create_user(username='u1', password='pass')
+        self.cat = Category.objects.create(name='Cat', slug='cat')
+        self.hot = Product.objects.create(category=self.cat, name='Hot', slug='hot', price='5.00', stock=3,
+                                          owner=self.admin)
+        self.other = Product.objects.create(category=self.cat, name='Other', slug='other', price='2.00', stock=10,
+                                            owner=self.admin)
+        self.client.force_authenticate(self.user)
+
+    def checkout(self, *lines):
+        for product, quantity in lines:
+            self.client.post('/api/cart/add/', {'product': product.id, 'quantity': quantity}, format='json')
+        return self.client.post('/api/orders/', {'shipping_address': 'addr'}, format='json')
+
+    def test_checkout_takes_stock_and_updates_facets(self):
+        res = self.checkout((self.hot, 3), (self.other, 1))
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.data['total_amount'], '17.00')
+        self.hot.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.hot.stock, self.other.stock), (0, 9))
+        stock = {s['value']: s['count'] for s in self.client.get('/api/products/').data['facets']['in_stock']}
+        self.assertEqual(stock, {True: 1, False: 1})
+
+    def test_oversold_checkout_is_rolled_back(self):
+        res = self.checkout((self.other, 2), (self.hot, 4))
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('stock', res.data)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(list(Product.objects.order_by('id').values_list('stock', flat=True)), [3, 10])
+        self.assertEqual(len(self.client.get('/api/cart/').data['items']), 2)
+
+
+class IdempotencyKeyTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        self.user = User.objects.create_user(username='u1', password='pass')
+        self.cat = Category.objects.create(name='Cat', slug='cat')
+        self.product = Product.objects.create(category=self.cat, name='P', slug='p', price='4.00', stock=5,
+                                              owner=self.admin)
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/cart/add/', {'product': self.product.id, 'quantity': 2}, format='json')
+
+    def place(self, key, address='addr'):
+        return self.client.post('/api/orders/', {'shipping_address': address}, format='json',
+                                HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_stored_response(self):
+        first = self.place('k1')
+        self.assertEqual(first.status_code, 201)
+        with CaptureQueriesContext(connection) as ctx:
+            again = self.place('k1')
+        self.assertEqual(again.status_code, 201)
+        self.assertEqual(again['Idempotent-Replayed'], 'true')
+        self.assertEqual(json.loads(again.content), json.loads(first.content))
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+        tables = {'api_cart', 'api_cartitem', 'api_order', 'api_orderitem', 'api_product'}
+        self.assertFalse([q['sql'] for q in ctx.captured_queries if any(t in q['sql'] for t in tables)])
+
+    def test_key_reused_with_other_payload_is_rejected(self):
+        self.place('k1')
+        self.assertEqual(self.place('k1', address='elsewhere').status_code, 422)
+
+    def test_key_still_in_progress_is_answered_with_conflict(self):
+        from api.models import IdempotencyKey
+        from api.idempotency import fingerprint
+        from django.utils import timezone
+        request = mock.Mock(method='POST', path='/api/orders/', data={'shipping_address': 'addr'})
+        IdempotencyKey.objects.create(user=self.user, key='k3', fingerprint=fingerprint(request), status_code=0,
+                                      response={}, expires_at=timezone.now() + timedelta(hours=1))
+        self.assertEqual(self.place('k3').status_code, 409)
+        self.assertEqual(Order.objects.count(), 0)
+
+        # The claimant died without storing a response; once its claim lapses a retry takes over.
+        IdempotencyKey.objects.filter(key='k3').update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.place('k3').status_code, 201)
+        self.assertEqual(self.place('k3')['Idempotent-Replayed'], 'true')
+        self.assertGreater(IdempotencyKey.objects.get(key='k3').expires_at, timezone.now() + timedelta(hours=23))
+
+    def test_failed_create_does_not_burn_the_key(self):
+        self.client.delete('/api/cart/remove/', {'product': self.product.id}, format='json')
+        self.assertEqual(self.place('k2').status_code, 400)
+        self.client.post('/api/cart/add/', {'product': self.product.id, 'quantity': 1}, format='json')
+        self.assertEqual(self.place('k2').status_code, 201)
+
+
+class AsyncCheckoutTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        self.user = User.objects.create_user(username='u1', password='pass', email='u1@example.com')
+        self.cat = Category.objects.create(name='Cat', slug='cat')
+        self.product = Product.objects.create(category=self.cat, name='P', slug='p', price='4.00', stock=5,
+                                              owner=self.admin)
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/cart/add/', {'product': self.product.id, 'quantity': 2}, format='json')
+
+    def place_async(self):
+        res = self.client.post('/api/orders/', {'shipping_address': 'addr'}, format='json',
+                               HTTP_PREFER='respond-async')
+        self.assertEqual(res.status_code, 202)
+        self.assertEqual(
+            list(OutboxMessage.objects.values_list('task', 'args')),
+            [('api.tasks.process_order_payment', [res.data['id']])],
+        )
+        return res
+
+    def test_order_is_accepted_pending_then_settled_by_task(self):
+        res = self.place_async()
+        self.assertEqual(res['Location'], res.data['status_url'])
+        self.assertEqual(self.client.get(res.data['status_url']).data['status'], 'pending')
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+
+        from api.tasks import process_order_payment
+        with mock.patch('api.emails.schedule_dispatch') as email:
+            self.assertEqual(process_order_payment(res.data['id']), 'paid')
+            self.assertIsNone(process_order_payment(res.data['id']))
+        email.assert_called_once_with()
+        status = self.client.get(res.data['status_url']).data
+        self.assertEqual((status['status'], status['payment_reference']), ('paid', f"mock_{res.data['id']}"))
+
+    def test_declined_payment_fails_order_and_restocks(self):
+        res = self.place_async()
+        from api import payments
+        from api.tasks import process_order_payment
+        with mock.patch.object(payments.StubPaymentProvider, 'charge', side_effect=payments.PaymentError):
+            self.assertEqual(process_order_payment(res.data['id']), 'failed')
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
+
+    def test_task_charges_a_leased_order_outside_any_transaction(self):
+        from django.db import transaction
+        from api import payments
+        from api.tasks import process_order_payment
+        res = self.place_async()
+        charge = payments.StubPaymentProvider.charge
+        test_blocks = len(transaction.get_connection().atomic_blocks)
+        seen = []
+
+        def outside_transaction(provider, order):
+            seen.append(len(transaction.get_connection().atomic_blocks))
+            # A second delivery while the lease is live leaves the order alone.
+            seen.append(process_order_payment(order.pk))
+            return charge(provider, order)
+
+        with mock.patch.object(payments.StubPaymentProvider, 'charge', outside_transaction):
+            self.assertEqual(process_order_payment(res.data['id']), 'paid')
+        self.assertEqual(seen, [test_blocks, None])
+        self.assertIsNone(Order.objects.get(pk=res.data['id']).payment_claimed_until)
+
+    def test_last_failed_attempt_fails_order_and_restocks(self):
+        from api import payments
+        from api.tasks import process_order_payment
+        res = self.place_async()
+        with mock.patch.object(payments.StubPaymentProvider, 'charge', side_effect=OSError('gateway down')):
+            with mock.patch.object(process_order_payment, 'retry', side_effect=RuntimeError('retry')):
+                with self.assertRaisesMessage(RuntimeError, 'retry'):
+                    process_order_payment(res.data['id'])
+            order = Order.objects.get(pk=res.data['id'])
+            self.assertEqual((order.status, order.payment_claimed_until), ('pending', None))
+            with self.assertLogs('api.tasks', 'ERROR'):
+                last = process_order_payment.apply(args=[res.data['id']], retries=process_order_payment.max_retries)
+            self.assertEqual(last.get(), 'failed')
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
+
+    def test_reaper_requeues_orders_stranded_in_pending(self):
+        from django.utils import timezone
+        from api import payments
+        with mock.patch.object(payments, 'charge', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                self.client.post('/api/orders/', {'shipping_address': 'addr'}, format='json')
+        order = Order.objects.get(user=self.user)
+        self.assertEqual(payments.reap_stale(), 0)
+
+        Order.objects.filter(pk=order.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(payments.reap_stale(), 1)
+        self.assertEqual(payments.reap_stale(), 0)
+        self.assertEqual(
+            list(OutboxMessage.objects.values_list('task', 'args')),
+            [('api.tasks.process_order_payment', [order.pk])],
+        )
+
+    def test_sync_checkout_charges_outside_the_reservation_transaction(self):
+        from django.db import transaction
+        from api import payments
+        charge = payments.StubPaymentProvider.charge
+        test_blocks = len(transaction.get_connection().atomic_blocks)
+        seen = []
+
+        def outside_transaction(provider, order):
+            # Only the test case's own atomic blocks may be open.
+            seen.append((Order.objects.get(pk=order.pk).status, len(transaction.get_connection().atomic_blocks)))
+            return charge(provider, order)
+
+        with mock.patch.object(payments.StubPaymentProvider, 'charge', outside_transaction):
+            res = self.client.post('/api/orders/', {'shipping_address': 'addr'}, format='json')
+        self.assertEqual((res.status_code, res.data['status']), (201, 'paid'))
+        self.assertEqual(seen, [('pending', test_blocks)])
+
+    def test_sync_decline_fails_order_and_restocks(self):
+        from api import payments
+        with mock.patch.object(payments.StubPaymentProvider, 'charge', side_effect=payments.PaymentError):
+            res = self.client.post('/api/orders/', {'shipping_address': 'addr'}, format='json')
+        self.assertEqual((res.status_code, res.data['order']['status']), (402, 'failed'))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
+
+
+class OrderHistoryTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='u1', password='pass')
+        cat = Category.objects.create(name='Cat', slug='cat')
+        product = Product.objects.create(category=cat, name='P', slug='p', price='2.00', owner=self.user)
+        self.orders = []
+        for i in range(5):
+            order = Order.objects.create(user=self.user, status='paid', total_amount=2 * (i + 1))
+            OrderItem.objects.create(order=order, product=product, unit_price='2.00', quantity=i + 1)
+            self.orders.append(order)
+        self.client.force_authenticate(self.user)
+
+    def test_list_pages_summaries_newest_first(self):
+        ids, url = [], '/api/orders/?page_size=2'
+        while url:
+            with self.assertNumQueries(1):
+                res = self.client.get(url)
+            self.assertNotIn('items', res.data['results'][0])
+            ids.extend(o['id'] for o in res.data['results'])
+            url = res.data['next']
+        self.assertEqual(ids, [o.id for o in reversed(self.orders)])
+        first = self.client.get('/api/orders/').data['results'][0]
+        self.assertEqual((first['item_count'], first['total_amount']), (5, '10.00'))
+
+    def test_retrieve_keeps_line_items(self):
+        res = self.client.get(f'/api/orders/{self.orders[0].id}/')
+        self.assertEqual([i['quantity'] for i in res.data['items']], [1])
+
+
+class SalesRollupTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        self.books = Category.objects.create(name='Books', slug='books')
+        self.audio = Category.objects.create(name='Audio', slug='audio')
+        self.novel = Product.objects.create(category=self.books, name='Novel', slug='novel', price='10.00',
+                                            owner=self.admin)
+        self.radio = Product.objects.create(category=self.audio, name='Radio', slug='radio', price='30.00',
+                                            owner=self.admin)
+        self.client.force_authenticate(self.admin)
+
+    def order(self, status='paid', **lines):
+        order = Order.objects.create(user=self.admin, status=status)
+        for slug, quantity in lines.items():
+            product = Product.objects.get(slug=slug)
+            OrderItem.objects.create(order=order, product=product, unit_price=product.price, quantity=quantity)
+        return order
+
+    def refresh(self):
+        from api import rollups
+        with override_settings(SALES_ROLLUP_LAG=0):
+            return rollups.refresh()
+
+    def report(self, group):
+        res = self.client.get('/api/analytics/sales/', {'group': group})
+        self.assertEqual(res.status_code, 200)
+        return res.data
+
+    def test_refresh_folds_in_changed_orders(self):
+        self.order(novel=2, radio=1)
+        pending = self.order(status='pending', novel=1)
+        self.assertEqual(self.refresh(), 1)
+        self.assertEqual(self.refresh(), 0)
+
+        day = self.report('day')
+        self.assertEqual(day['totals'], {'orders': 1, 'units': 3, 'revenue': Decimal('50.00')})
+        products = {r['name']: (r['units'], r['revenue']) for r in self.report('product')['results']}
+        self.assertEqual(products, {'Radio': (1, Decimal('30.00')), 'Novel': (2, Decimal('20.00'))})
+
+        pending.status = 'paid'
+        pending.save()
+        self.refresh()
+        categories = {r['name']: r['orders'] for r in self.report('category')['results']}
+        self.assertEqual(categories, {'Books': 2, 'Audio': 1})
+        self.assertEqual(self.report('day')['totals']['orders'], 2)
+
+    def test_report_is_admin_only_and_validates_window(self):
+        res = self.client.get('/api/analytics/sales/', {'start': '2026-02-01', 'end': '2026-01-01'})
+        self.assertEqual(res.status_code, 400)
+        self.client.force_authenticate(User.objects.create_user(username='u1', password='pass'))
+        self.assertEqual(self.client.get('/api/analytics/sales/').status_code, 403)
+
+
+class DashboardStatsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        cat = Category.objects.create(name='Cat', slug='cat')
+        self.product = Product.objects.create(category=cat, name='P', slug='p', price='5.00', stock=2,
+                                              owner=self.admin)
+        Product.objects.create(category=cat, name='Q', slug='q', price='5.00', stock=50, owner=self.admin)
+        order = Order.objects.create(user=self.admin, status='paid', total_amount='15.00')
+        OrderItem.objects.create(order=order, product=self.product, unit_price='5.00', quantity=3)
+        self.client.force_authenticate(self.admin)
+
+    def test_stats_are_cached_between_requests(self):
+        res = self.client.get('/api/analytics/dashboard/')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual((res.data['products'], res.data['low_stock'], res.data['orders_today']), (2, 1, 1))
+        self.assertEqual(res.data['revenue_7d'], Decimal('15.00'))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/analytics/dashboard/').data, res.data)
+
+        self.client.force_authenticate(User.objects.create_user(username='u1', password='pass'))
+        self.assertEqual(self.client.get('/api/analytics/dashboard/').status_code, 403)
+
+    def test_stale_value_is_served_while_another_worker_rebuilds(self):
+        from api.cache import get_or_refresh
+        compute = mock.Mock(return_value='fresh')
+        cache.set('k', ('stale', 0), None)
+        cache.add('lock:k', 1)
+        self.assertEqual(get_or_refresh('k', compute, ttl=60), 'stale')
+        compute.assert_not_called()
+
+        cache.delete('lock:k')
+        self.assertEqual(get_or_refresh('k', compute, ttl=60), 'fresh')
+        self.assertEqual(get_or_refresh('k', compute, ttl=60), 'fresh')
+        compute.assert_called_once()
+
+
+class ConfirmationEmailTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        cat = Category.objects.create(name='Cat', slug='cat')
+        self.products = [
+            Product.objects.create(category=cat, name=f'P{i}', slug=f'p{i}', price='2.00', owner=self.admin)
+            for i in range(3)
+        ]
+
+    def paid_order(self, email):
+        user = User.objects.create_user(username=f'user{User.objects.count()}', password='pass', email=email)
+        order = Order.objects.create(user=user, status='paid', total_amount='6.00')
+        for product in self.products:
+            OrderItem.objects.create(order=order, product=product, unit_price='2.00', quantity=1)
+        return order
+
+    def test_batch_renders_with_fixed_query_count(self):
+        from django.core import mail
+        from api.emails import dispatch_confirmations
+        self.paid_order('a@example.com')
+        self.paid_order('')
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(dispatch_confirmations(), {'sent': 1, 'failed': 0})
+        for i in range(5):
+            self.paid_order(f'b{i}@example.com')
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(dispatch_confirmations(), {'sent': 5, 'failed': 0})
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(len(mail.outbox), 6)
+        self.assertIn('P2', mail.outbox[0].body)
+        self.assertEqual(dispatch_confirmations(), {'sent': 0, 'failed': 0})
+
+    def test_confirmation_is_rendered_from_templates(self):
+        from api.emails import build_confirmation
+        self.products[0].name = 'Tea & Co'
+        self.products[0].save()
+        order = self.paid_order('a@example.com')
+        message = build_confirmation(Order.objects.get(pk=order.pk))
+        self.assertIn(f'SK-{order.id:04d}', message.subject)
+        self.assertIn('- Tea & Co (Qty: 1 × $2.00) = $2.00', message.body)
+        html = message.alternatives[0][0]
+        self.assertIn('<strong>Tea &amp; Co</strong>', html)
+        self.assertIn('Total Amount: $6.00', html)
+
+    @override_settings(ORDER_EMAIL_MAX_ATTEMPTS=2)
+    def test_failed_messages_are_retried_until_attempts_run_out(self):
+        from django.core.mail.backends.locmem import EmailBackend
+        from api.emails import dispatch_confirmations
+        good, bad = self.paid_order('good@example.com'), self.paid_order('bad@example.com')
+        send = EmailBackend.send_messages
+
+        def flaky(backend, messages):
+            if 'bad@example.com' in messages[0].to:
+                raise OSError('rejected')
+            return send(backend, messages)
+
+        with mock.patch.object(EmailBackend, 'send_messages', flaky), self.assertLogs('api.emails', 'ERROR'):
+            self.assertEqual(dispatch_confirmations(), {'sent': 1, 'failed': 1})
+            self.assertEqual(dispatch_confirmations(), {'sent': 0, 'failed': 1})
+            self.assertEqual(dispatch_confirmations(), {'sent': 0, 'failed': 0})
+        bad.refresh_from_db()
+        good.refresh_from_db()
+        self.assertEqual((bad.confirmation_attempts, bad.confirmation_sent_at), (2, None))
+        self.assertIsNotNone(good.confirmation_sent_at)
+
+    def test_batch_is_sent_outside_the_claim_transaction(self):
+        from django.core.mail.backends.locmem import EmailBackend
+        from django.utils import timezone
+        from api.emails import dispatch_confirmations
+        order = self.paid_order('a@example.com')
+        claimed = self.paid_order('b@example.com')
+        Order.objects.filter(pk=claimed.pk).update(confirmation_claimed_until=timezone.now() + timedelta(minutes=5))
+        baseline = len(connection.atomic_blocks)
+        send = EmailBackend.send_messages
+        seen = []
+
+        def recording(backend, messages):
+            seen.append((messages[0].to, len(connection.atomic_blocks)))
+            return send(backend, messages)
+
+        with mock.patch.object(EmailBackend, 'send_messages', recording):
+            self.assertEqual(dispatch_confirmations(), {'sent': 1, 'failed': 0})
+        self.assertEqual(seen, [(['a@example.com'], baseline)])
+        order.refresh_from_db()
+        self.assertIsNotNone(order.confirmation_sent_at)
+        self.assertIsNone(order.confirmation_claimed_until)
+
+        Order.objects.filter(pk=claimed.pk).update(confirmation_claimed_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(dispatch_confirmations(), {'sent': 1, 'failed': 0})
+
+
+class OutboxTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin1', password='pass', is_staff=True)
+        self.user = User.objects.create_user(username='u1', password='pass', email='u1@example.com')
+        self.cat = Category.objects.create(name='Cat', slug='cat')
+        self.product = Product.objects.create(category=self.cat, name='P', slug='p', price='4.00', stock=1,
+                                              owner=self.admin)
+        self.client.force_authenticate(self.user)
+
+    def checkout(self, quantity):
+        self.client.post('/api/cart/add/', {'product': self.product.id, 'quantity': quantity}, format='json')
+        return self.client.post('/api/orders/', {'shipping_address': 'addr'}, format='json')
+
+    def test_message_commits_and_rolls_back_with_the_order(self):
+        with mock.patch('api.outbox.current_app') as app:
+            self.assertEqual(self.checkout(1).status_code, 201)
+            app.send_task.assert_not_called()
+        self.assertEqual(
+            list(OutboxMessage.objects.values_list('task', 'coalesce')),
+            [('api.tasks.send_order_confirmations', True)],
+        )
+        self.assertEqual(self.checkout(1).status_code, 400)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    def test_publish_coalesces_duplicates_and_deletes_rows(self):
+        from api import outbox
+        for _ in range(3):
+            outbox.enqueue('api.tasks.send_order_confirmations', countdown=5, coalesce=True)
+        outbox.enqueue('api.tasks.process_order_payment', args=[7])
+        with mock.patch('api.outbox.current_app') as app:
+            self.assertEqual(outbox.publish_pending(), {'published': 2, 'coalesced': 2, 'failed': 0})
+        self.assertEqual([c.args[0] for c in app.send_task.call_args_list],
+                         ['api.tasks.send_order_confirmations', 'api.tasks.process_order_payment'])
+        self.assertIsNotNone(app.send_task.call_args_list[0].kwargs['eta'])
+        self.assertEqual(app.send_task.call_args_list[1].kwargs['args'], [7])
+        self.assertEqual(outbox.backlog(), 0)
+
+    def test_broker_error_keeps_the_message_for_the_next_round(self):
+        from api import outbox
+        first = outbox.enqueue('api.tasks.refresh_sales_rollups')
+        outbox.enqueue('api.tasks.purge_idempotency_keys')
+        with mock.patch('api.outbox.current_app') as app, self.assertLogs('api.outbox', 'WARNING'):
+            app.send_task.side_effect = ConnectionError('broker down')
+            self.assertEqual(outbox.publish_pending(), {'published': 0, 'coalesced': 0, 'failed': 1})
+        app.send_task.assert_called_once()
+        first.refresh_from_db()
+        self.assertEqual((first.attempts, first.last_error), (1, 'broker down'))
+        with mock.patch('api.outbox.current_app'):
+            call_command('dispatch_outbox', '--once', stdout=io.StringIO())
+        self.assertEqual(outbox.backlog(), 0)
+
+
+class TaskRoutingTests(APITestCase):
+    def test_background_tasks_stay_off_the_default_queue(self):
+        from Backend.celery import app
+        from api import tasks
+        queue = lambda name: app.amqp.router.route({}, name)['queue'].name
+        self.assertEqual(queue('api.tasks.process_order_payment'), 'default')
+        self.assertEqual(queue('api.tasks.send_order_confirmations'), 'email')
+        self.assertEqual(queue('api.tasks.refresh_sales_rollups'), 'analytics')
+        self.assertEqual(queue('api.tasks.purge_idempotency_keys'), 'maintenance')
+        self.assertTrue(tasks.refresh_sales_rollups.acks_late)
+        self.assertTrue(tasks.send_order_confirmations.ignore_result)
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        cache.clear()
+        self.user = User.objects.create_user(username='u1', password='pass', email='u1@example.com')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_user_is_resolved_from_cache_after_first_request(self):
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/auth/me/').data['username'], 'u1')
+
+    def test_cache_holds_no_password_hash(self):
+        from api.authentication import user_cache_key
+        self.client.get('/api/auth/me/')
+        entry = cache.get(user_cache_key(self.user.pk))
+        self.assertEqual((entry['id'], entry['is_active']), (self.user.pk, True))
+        self.assertNotIn(self.user.password, entry.values())
+        self.assertNotIn('password', entry)
+
+    def test_profile_update_and_deactivation_invalidate_the_cached_user(self):
+        self.client.get('/api/auth/me/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch('/api/auth/me/', {'email': 'new@example.com'}, format='json')
+        self.assertEqual(self.client.get('/api/auth/me/').data['email'], 'new@example.com')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('pass'))
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 401)
+
+
+class TokenBucketThrottleTests(APITestCase):
+    def setUp(self):
+        throttling.get_bucket_store().clear()
+        self.addCleanup(throttling.get_bucket_store().clear)
+
+    def register(self, i):
+        return self.client.post('/api/auth/register/', {'username': f'new{i}', 'email': f'new{i}@example.com',
+                                                        'password': 'S3cure-pass!'}, format='json')
+
+    def test_register_burst_is_capped_per_ip_without_touching_the_db(self):
+        for i in range(5):
+            self.assertEqual(self.register(i).status_code, 201)
+        with self.assertNumQueries(0):
+            res = self.register(5)
+        self.assertEqual(res.status_code, 429)
+        self.assertGreater(int(res['Retry-After']), 0)
+        self.assertEqual(self.register(6).status_code, 429)
+
+    def test_spoofed_forwarded_for_does_not_get_a_fresh_bucket(self):
+        for i in range(5):
+            self.register(i)
+        res = self.client.post('/api/auth/register/', {'username': 'new5', 'password': 'S3cure-pass!'},
+                               format='json', HTTP_X_FORWARDED_FOR='203.0.113.9')
+        self.assertEqual(res.status_code, 429)
+
+    def test_checkout_is_limited_per_user_and_reads_are_not(self):
+        from django.conf import settings
+        owner = User.objects.create_user(username='owner', password='pass')
+        cat = Category.objects.create(name='Cat', slug='cat')
+        product = Product.objects.create(category=cat, name='P', slug='p', price='4.00', stock=10, owner=owner)
+        rates = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'checkout': '1/min'}}
+        with override_settings(REST_FRAMEWORK=rates):
+            for username in ('a', 'b'):
+                self.client.force_authenticate(User.objects.create_user(username=username, password='pass'))
+                for expected in (201, 429):
+                    self.client.post('/api/cart/add/', {'product': product.id, 'quantity': 1}, format='json')
+                    res = self.client.post('/api/orders/', {'shipping_address': 'addr'}, format='json')
+                    self.assertEqual(res.status_code, expected)
+                self.assertEqual(self.client.get('/api/orders/').status_code, 200)
+
+    def test_unreachable_store_lets_requests_through(self):
+        with mock.patch.object(throttling.LocMemBucketStore, 'take', side_effect=ConnectionError), \
+                self.assertLogs('api.throttling', 'ERROR'):
+            self.assertEqual(self.register(0).status_code, 201)
+
+
+class AsyncCatalogTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user(username='owner', password='pass')
+        self.cats = [Category.objects.create(name=f'Cat {i}', slug=f'cat-{i}') for i in range(2)]
+        self.products = [
+            Product.objects.create(category=self.cats[i % 2], name=f'P{i % 3}', slug=f'p{i}', price=f'{i + 1}.00',
+                                   stock=i % 2, owner=owner)
+            for i in range(5)
+        ]
+
+    def test_product_list_matches_the_sync_viewset_page_by_page(self):
+        sync = self.client.get('/api/products/?page_size=2&category=%d' % self.cats[0].id).data
+        res = self.client.get('/api/async/products/?page_size=2&category=%d' % self.cats[0].id)
+        self.assertEqual(res.status_code, 200)
+        body = res.json()
+        self.assertEqual(body['results'], json.loads(json.dumps(sync['results'])))
+        self.assertEqual(body['facets'], json.loads(json.dumps(sync['facets'])))
+
+        seen = [row['id'] for row in body['results']]
+        while body['next']:
+            body = self.client.get(body['next']).json()
+            seen += [row['id'] for row in body['results']]
+        expected = Product.objects.filter(category=self.cats[0]).order_by('name', 'id').values_list('id', flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_detail_categories_and_errors(self):
+        product = self.products[0]
+        self.assertEqual(self.client.get(f'/api/async/products/{product.id}/').json(),
+                         json.loads(json.dumps(self.client.get(f'/api/products/{product.id}/').data)))
+        self.assertEqual(self.client.get('/api/async/categories/').json(),
+                         json.loads(json.dumps(self.client.get('/api/categories/').data)))
+        Product.objects.filter(pk=product.pk).update(is_active=False)
+        self.assertEqual(self.client.get(f'/api/async/products/{product.id}/').status_code, 404)
+        self.assertEqual(self.client.get('/api/async/products/?cursor=junk').status_code, 400)
+        self.assertEqual(self.client.post('/api/async/categories/').status_code, 405)
@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+
+_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate: str):
+    """``"5/min"`` -> (capacity 5, refill 5/60 tokens per second), in DRF's rate notation."""
+    num, period = rate.split("/")
+    capacity = int(num)
+    return capacity, capacity / _PERIODS[period[0]]
+
+
+class LocMemBucketStore:
+    """Buckets in a process-local dict; enough for tests and a single runserver."""
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def take(self, key: str, capacity: int, refill: float):
+        now = time.monotonic()
+        with self.lock:
+            tokens, stamp = self.buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - stamp) * refill)
+            if tokens >= 1:
+                self.buckets[key] = (tokens - 1, now)
+                return True, 0.0
+            self.buckets[key] = (tokens, now)
+            return False, (1 - tokens) / refill
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class RedisBucketStore:
+    """
+    One hash per bucket (``throttle:<scope>:<ident>``: tokens, ts), refilled and
+    spent by a Lua script, so concurrent requests on any web process see one
+    consistent count. The script reads the Redis clock, so skew between web hosts
+    does not matter, and expires an idle bucket once it would be full again.
+    """
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local refill = tonumber(ARGV[2])
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local stamp = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - stamp) * refill)
+    local allowed, wait = 0, 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    else
+        wait = (1 - tokens) / refill
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / refill * 1000))
+    return {allowed, tostring(wait)}
+    """
+
+    def __init__(self, client=None):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(settings.THROTTLE_REDIS_URL, decode_responses=True)
+        self.client = client
+        self.script = client.register_script(self.SCRIPT)
+
+    def take(self, key: str, capacity: int, refill: float):
+        allowed, wait = self.script(keys=[key], args=[capacity, refill])
+        return bool(int(allowed)), float(wait)
+
+    def clear(self):
+        for key in self.client.scan_iter("throttle:*"):
+            self.client.delete(key)
+
+
+STORES = {
+    "locmem": LocMemBucketStore,
+    "redis": RedisBucketStore,
+}
+
+_instances = {}
+
+
+def get_bucket_store():
+    backend = settings.THROTTLE_STORE
+    if backend not in _instances:
+        _instances[backend] = STORES[backend]()
+    return _instances[backend]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token-bucket limit for the view's ``throttle_scope``, at the rate configured
+    for that scope in REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]. A bucket holds as
+    many tokens as the rate's count and refills evenly over its period, so short
+    bursts pass while the sustained rate is capped.
+
+    Authenticated requests are counted per user and anonymous ones per client IP
+    (REMOTE_ADDR, or X-Forwarded-For when REST_FRAMEWORK["NUM_PROXIES"] says it is set by our proxies).
+    Nothing is read from the database: the user is already resolved by
+    authentication. When the store is unreachable the request is let through,
+    because a throttle outage should not take down sign-up or checkout.
+    """
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def allow_request(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope) if scope else None
+        if not rate:
+            return True
+        if request.user and request.user.is_authenticated:
+            ident = f"user:{request.user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+        capacity, refill = parse_rate(rate)
+        try:
+            allowed, self.wait_seconds = get_bucket_store().take(f"throttle:{scope}:{ident}", capacity, refill)
+        except Exception:
+            logger.exception("Throttle store unavailable; allowing %s request", scope)
+            return True
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
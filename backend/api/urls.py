@@ -1,14 +1,23 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, ProductViewSet, CartViewSet, OrderViewSet, AuthViewSet
+from . import async_views
+from .views import (
+    AnalyticsViewSet, CategoryViewSet, ProductViewSet, CacheViewSet, CartViewSet, OrderViewSet, AuthViewSet,
+)
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'products', ProductViewSet, basename='product')
+router.register(r'cache', CacheViewSet, basename='cache')
 router.register(r'cart', CartViewSet, basename='cart')
 router.register(r'orders', OrderViewSet, basename='order')
 router.register(r'auth', AuthViewSet, basename='auth')
+router.register(r'analytics', AnalyticsViewSet, basename='analytics')
 
 urlpatterns = [
     path('', include(router.urls)),
+    # Native async catalog reads; see api/async_views.py
+    path('async/products/', async_views.product_list, name='async-product-list'),
+    path('async/products/<int:pk>/', async_views.product_detail, name='async-product-detail'),
+    path('async/categories/', async_views.category_list, name='async-category-list'),
 ]
@@ -1,44 +1,170 @@
+import io
+import logging
+
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.shortcuts import get_object_or_404
-from django.contrib.auth.models import User
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework_simplejwt.views import TokenObtainPairView
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
 
-from .models import Category, Product, Cart, CartItem, Order, OrderItem
+from .models import Category, Product, Cart, Order
 from .serializers import (
     CategorySerializer,
     ProductSerializer,
+    ProductListSerializer,
     CartSerializer,
     CartItemSerializer,
+    CartBatchSerializer,
     OrderSerializer,
+    OrderSummarySerializer,
     OrderCreateSerializer,
+    SalesReportQuerySerializer,
     RegisterSerializer,
     UserUpdateSerializer,
 )
 from .permissions import IsAdminOrOwnerOrReadOnly, IsAdminOnly
-from .tasks import send_order_confirmation_email
+from .pagination import OrderCursorPagination, ProductCursorPagination, ProductSearchPagination
+from .search import search_products
+from .filters import CatalogFilterBackend, catalog_selection
+from .facets import facet_counts
+from .conditional import ConditionalGetMixin
+from .cache import CachedResponseMixin
+from .idempotency import idempotent
+from .throttling import TokenBucketThrottle
+from . import cache
+from . import dashboard, emails, importers, exports, outbox, payments, rollups
+from .cart_store import get_cart_store
+
+logger = logging.getLogger(__name__)
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAdminOnly]
+    # Counter updates stamp Category.updated_at, so product_count changes are covered.
+    conditional_models = (Category,)
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Product.objects.filter(is_active=True).select_related("category", "owner")
     serializer_class = ProductSerializer
     permission_classes = [IsAdminOrOwnerOrReadOnly]
+    pagination_class = ProductCursorPagination
+    filter_backends = [CatalogFilterBackend]
+    # Facets embed category names, so category edits also change the list body.
+    conditional_models = (Product, Category)
+
+    def get_serializer_class(self):
+        if self.action in ["list", "search"] and self.request.query_params.get("view") == "compact":
+            return ProductListSerializer
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ["list", "retrieve", "search"]:
+            return queryset
+        # Load only the columns the (possibly trimmed) serializer will read, plus
+        # the pagination key and the updated_at the conditional-GET validators use.
+        columns = {"id", "updated_at"}
+        for ordering in ProductCursorPagination.orderings.values():
+            columns.update(field.lstrip("-") for field in ordering)
+        related = set()
+        for field in self.get_serializer().fields.values():
+            if field.source == "*":
+                continue
+            path = field.source.split(".")
+            columns.add("__".join(path))
+            if len(path) > 1:
+                related.add(path[0])
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.action == "list":
+            response.data["facets"] = facet_counts(**catalog_selection(self.request.query_params))
+        return response
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
     def get_permissions(self):
-        if self.action in ["list", "retrieve"]:
+        if self.action in ["list", "retrieve", "search"]:
             return [AllowAny()]
         return super().get_permissions()
 
+    @action(detail=False, methods=["get"], url_path="search", pagination_class=ProductSearchPagination)
+    def search(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise ValidationError({"q": "This query parameter is required."})
+        queryset = search_products(self.filter_queryset(self.get_queryset()), query).order_by("-search_rank", "id")
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=["get"], url_path="export", permission_classes=[IsAdminUser])
+    def export(self, request):
+        return export_response(exports.product_rows(), exports.PRODUCT_COLUMNS, request, "products")
+
+    @action(detail=False, methods=["post"], url_path="import",
+            permission_classes=[IsAdminUser], parser_classes=[MultiPartParser])
+    def import_products(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": "Upload a CSV or JSONL file."})
+        try:
+            fmt = request.data.get("format") or importers.detect_format(upload.name)
+            batch_size = int(request.data.get("batch_size") or 1000)
+            stream = io.TextIOWrapper(upload.file, encoding="utf-8", newline="")
+            stats = importers.import_products(importers.read_rows(stream, fmt), request.user, batch_size=batch_size)
+        except ValueError as exc:
+            raise ValidationError({"file": str(exc)})
+        return Response(stats)
+
+
+def export_response(rows, columns, request, filename):
+    fmt = request.query_params.get("output", "ndjson")
+    if fmt not in exports.EXPORT_FORMATS:
+        raise ValidationError({"output": f"Expected one of {', '.join(exports.EXPORT_FORMATS)}."})
+    response = StreamingHttpResponse(exports.render(rows, columns, fmt), content_type=exports.CONTENT_TYPES[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+
+class CacheViewSet(viewsets.ViewSet):
+    permission_classes = [IsAdminUser]
+
+    @action(detail=False, methods=["get"], url_path="stats")
+    def stats(self, request):
+        return Response(cache.stats())
+
+
+class AnalyticsViewSet(viewsets.ViewSet):
+    """Read-only sales figures served from the rollup tables in api.rollups."""
+
+    permission_classes = [IsAdminUser]
+
+    @action(detail=False, methods=["get"], url_path="sales")
+    def sales(self, request):
+        params = SalesReportQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(rollups.sales_report(**params.validated_data))
+
+    @action(detail=False, methods=["get"], url_path="dashboard")
+    def dashboard(self, request):
+        return Response(dashboard.stats())
+
 
 class CartViewSet(viewsets.GenericViewSet, mixins.ListModelMixin):
     permission_classes = [IsAuthenticated]
@@ -47,76 +173,145 @@ class CartViewSet(viewsets.GenericViewSet, mixins.ListModelMixin):
     def get_queryset(self):
         return Cart.objects.filter(user=self.request.user).prefetch_related("items__product")
 
+    def cart_response(self, cart):
+        # The store hands back the cart with its lines and products already loaded,
+        # and totals are summed from those rows, so every cart endpoint costs the
+        # same whatever the cart size.
+        return Response(CartSerializer(cart).data)
+
     def list(self, request, *args, **kwargs):
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        serializer = self.get_serializer(cart)
-        return Response(serializer.data)
+        return self.cart_response(get_cart_store().load(request.user))
 
     @action(detail=False, methods=["post"], url_path="add")
     def add_item(self, request):
-        cart, _ = Cart.objects.get_or_create(user=request.user)
         serializer = CartItemSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        product = get_object_or_404(Product, pk=serializer.validated_data["product"].id)
+        product = serializer.validated_data["product"]
         quantity = serializer.validated_data["quantity"]
-        item, created = CartItem.objects.get_or_create(cart=cart, product=product, defaults={"quantity": quantity})
-        if not created:
-            item.quantity += quantity
-            item.save()
-        return Response(CartSerializer(cart).data, status=status.HTTP_200_OK)
+        return self.cart_response(get_cart_store().add(request.user, product.id, quantity))
+
+    @action(detail=False, methods=["post"], url_path="batch")
+    def batch(self, request):
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        increments, quantities = CartBatchSerializer.fold(serializer.validated_data["operations"])
+        return self.cart_response(get_cart_store().apply(request.user, increments, quantities))
 
     @action(detail=False, methods=["patch"], url_path="update")
     def update_item(self, request):
-        cart, _ = Cart.objects.get_or_create(user=request.user)
         serializer = CartItemSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         product = serializer.validated_data["product"]
         quantity = serializer.validated_data["quantity"]
-        item = get_object_or_404(CartItem, cart=cart, product=product)
-        item.quantity = quantity
-        item.save()
-        return Response(CartSerializer(cart).data)
+        cart = get_cart_store().update(request.user, product.id, quantity)
+        if cart is None:
+            raise Http404("No such item in the cart.")
+        return self.cart_response(cart)
 
     @action(detail=False, methods=["delete"], url_path="remove")
     def remove_item(self, request):
-        cart, _ = Cart.objects.get_or_create(user=request.user)
         serializer = CartItemSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         product = serializer.validated_data["product"]
-        CartItem.objects.filter(cart=cart, product=product).delete()
-        return Response(CartSerializer(cart).data)
+        return self.cart_response(get_cart_store().remove(request.user, product.id))
 
 
 class OrderViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.RetrieveModelMixin):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+
+    pagination_class = OrderCursorPagination
+
+    @property
+    def throttle_scope(self):
+        # Only placing an order is expensive; history and status reads stay unthrottled.
+        return "checkout" if self.action == "create" else None
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user).prefetch_related("items__product")
+        queryset = Order.objects.filter(user=self.request.user)
+        if self.action == "list":
+            return queryset.annotate(item_count=Coalesce(Sum("items__quantity"), 0))
+        if self.action == "order_status":
+            return queryset.only("id", "user_id", "status", "payment_reference", "updated_at")
+        return queryset.prefetch_related("items__product")
 
     def get_serializer_class(self):
         if self.action == "create":
             return OrderCreateSerializer
+        if self.action == "list":
+            return OrderSummarySerializer
         return OrderSerializer
 
+    @idempotent
     def create(self, request, *args, **kwargs):
+        # RFC 7240: `Prefer: respond-async` accepts the order now and charges it in a worker.
+        respond_async = "respond-async" in request.headers.get("Prefer", "")
         serializer = OrderCreateSerializer(data=request.data, context={"request": request})
         serializer.is_valid(raise_exception=True)
-        order = serializer.save()
-        # Fire-and-forget email
-        user_email = getattr(request.user, 'email', '') or ''
-        if user_email:
-            try:
-                send_order_confirmation_email.delay(order.id, user_email)
-            except Exception:
-                pass
+        # The order and its stock reservation commit in one short transaction, so the
+        # stock row locks are never held across the payment call. Follow-up tasks go
+        # through the outbox in the same transaction, so the request never waits on
+        # the broker and a broker outage loses nothing.
+        with transaction.atomic():
+            order = serializer.save()
+            if respond_async:
+                outbox.enqueue("api.tasks.process_order_payment", args=[order.id])
+        if respond_async:
+            return self.accepted(request, order)
+
+        # Should this process die before record(), payments.reap_stale re-queues the order.
+        try:
+            reference = payments.charge(order)
+        except Exception:
+            logger.exception("Payment provider failed for order %s; settling it in a worker", order.pk)
+            with transaction.atomic():
+                outbox.enqueue("api.tasks.process_order_payment", args=[order.id])
+            return self.accepted(request, order, preference_applied=False)
+        with transaction.atomic():
+            paid = payments.record(order, reference)
+            if paid and getattr(request.user, 'email', ''):
+                emails.schedule_dispatch()
+        if not paid:
+            return Response(
+                {"payment": ["The payment was declined."], "order": OrderSerializer(order).data},
+                status=status.HTTP_402_PAYMENT_REQUIRED,
+            )
         return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
 
+    def accepted(self, request, order, preference_applied=True):
+        status_url = request.build_absolute_uri(reverse("order-order-status", args=[order.id]))
+        headers = {"Location": status_url}
+        if preference_applied:
+            headers["Preference-Applied"] = "respond-async"
+        return Response(
+            {"id": order.id, "status": order.status, "status_url": status_url},
+            status=status.HTTP_202_ACCEPTED,
+            headers=headers,
+        )
+
+    @action(detail=True, methods=["get"], url_path="status")
+    def order_status(self, request, pk=None):
+        order = self.get_object()
+        return Response({
+            "id": order.id,
+            "status": order.status,
+            "payment_reference": order.payment_reference,
+            "updated_at": order.updated_at,
+        })
+
+    @action(detail=False, methods=["get"], url_path="export", permission_classes=[IsAdminUser])
+    def export(self, request):
+        rows = exports.order_item_rows(status=request.query_params.get("status"))
+        return export_response(rows, exports.ORDER_ITEM_COLUMNS, request, "order-items")
+
 
 class AuthViewSet(viewsets.GenericViewSet):
     permission_classes = [AllowAny]
     serializer_class = RegisterSerializer
+    throttle_scope = None
 
-    @action(detail=False, methods=["post"], url_path="register")
+    @action(detail=False, methods=["post"], url_path="register", throttle_classes=[TokenBucketThrottle],
+            throttle_scope="register")
     def register(self, request):
         serializer = RegisterSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -138,3 +333,9 @@ class AuthViewSet(viewsets.GenericViewSet):
             "date_joined": user.date_joined,
         })
 
+
+class ThrottledTokenObtainPairView(TokenObtainPairView):
+    """JWT login; every attempt runs a password hash, so attempts are rate limited per client."""
+
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "jwt"
@@ -4,20 +4,26 @@ import { api } from '../services/api'
 
 export default function OrdersPage() {
   const [orders, setOrders] = useState([])
+  const [cursor, setCursor] = useState(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState('')
   const orderNo = (id) => `SK-${String(id).padStart(4,'0')}`
 
-  useEffect(() => {
+  const loadPage = (next) => {
     setLoading(true)
-    api.listOrders()
-      .then(setOrders)
+    return api.listOrders(next)
+      .then(page => {
+        setOrders(prev => next ? [...prev, ...page.results] : page.results)
+        setCursor(page.cursor)
+      })
       .catch(e => setError(e.message))
       .finally(() => setLoading(false))
-  }, [])
+  }
+
+  useEffect(() => { loadPage() }, [])
 
   if (error) return <div className='text-red-600'>Error: {error}</div>
-  if (loading) return <div>Loading...</div>
+  if (loading && orders.length === 0) return <div>Loading...</div>
 
   return (
     <div className='space-y-6'>
@@ -38,21 +44,7 @@ export default function OrdersPage() {
               <div className='text-sm'>$ {Number(order.total_amount).toFixed(2)}</div>
             </div>
             <div className='text-xs text-gray-500'>
-              Placed on {order.created_at ? new Date(order.created_at).toLocaleString() : '—'} • Payment: {order.payment_reference || '—'}
-            </div>
-            <div className='mt-3 space-y-2'>
-              {(order.items || []).map(i => (
-                <div key={i.id} className='flex items-center gap-3 text-sm'>
-                  {i.product_image_url && (
-                    <img src={i.product_image_url} alt={i.product_name} className='h-10 w-10 rounded object-cover border border-gray-200' />
-                  )}
-                  <div className='flex-1'>
-                    <div className='font-medium'>{i.product_name || `Product #${i.product}`}</div>
-                    <div className='text-xs text-gray-500'>$ {Number(i.product_price || i.unit_price || 0).toFixed(2)} × {i.quantity}</div>
-                  </div>
-                  <div className='text-sm'>$ {Number(i.subtotal).toFixed(2)}</div>
-                </div>
-              ))}
+              Placed on {order.created_at ? new Date(order.created_at).toLocaleString() : '—'} • {order.item_count} items • Payment: {order.payment_reference || '—'}
             </div>
             <div className='mt-3'>
               <Link className='btn btn-secondary' to={`/order-confirmation/${order.id}`}>View details</Link>
@@ -60,6 +52,14 @@ export default function OrdersPage() {
           </div>
         ))}
       </div>
+
+      {cursor && (
+        <div className='text-center'>
+          <button className='btn btn-secondary' disabled={loading} onClick={() => loadPage(cursor)}>
+            {loading ? 'Loading...' : 'Load more'}
+          </button>
+        </div>
+      )}
     </div>
   )
 }
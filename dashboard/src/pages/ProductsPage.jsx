@@ -3,37 +3,44 @@ import { Link } from 'react-router-dom'
 import { useToast } from '../components/ToastProvider'
 import { api } from '../services/api'
 
+// Server-side orderings (?ordering=) for the sort menu.
+const ORDERINGS = { 'name': 'name', 'price-low': 'price', 'price-high': '-price' }
+
 export default function ProductsPage() {
   const [items, setItems] = useState([])
+  const [next, setNext] = useState(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState('')
   const [sortBy, setSortBy] = useState('name')
   const [filter, setFilter] = useState('')
+  const [query, setQuery] = useState('')
   const toast = useToast()
 
+  // Search as the user stops typing, not on every keystroke.
   useEffect(() => {
-    api.listProducts()
-      .then(products => {
-        setItems(products);
+    const timer = setTimeout(() => setQuery(filter.trim()), 300)
+    return () => clearTimeout(timer)
+  }, [filter])
+
+  // Filtering and sorting happen on the server, so they cover the whole catalog;
+  // `next` fetches the following page of the same selection.
+  const loadPage = (more) => {
+    setLoading(true)
+    const page = query
+      ? api.searchProducts(query, more).then(p => ({ results: p.results, next: p.page }))
+      : api.listProducts({ ordering: ORDERINGS[sortBy] }, more).then(p => ({ results: p.results, next: p.cursor }))
+    return page
+      .then(p => {
+        setItems(prev => more ? [...prev, ...p.results] : p.results)
+        setNext(p.next)
       })
       .catch(e => setError(e.message))
       .finally(() => setLoading(false))
-  }, [])
+  }
 
-  // Filter and sort products
-  const filteredAndSortedItems = items
-    .filter(item => 
-      item.name.toLowerCase().includes(filter.toLowerCase()) ||
-      item.description?.toLowerCase().includes(filter.toLowerCase())
-    )
-    .sort((a, b) => {
-      if (sortBy === 'name') return a.name.localeCompare(b.name);
-      if (sortBy === 'price-low') return a.price - b.price;
-      if (sortBy === 'price-high') return b.price - a.price;
-      return 0;
-    });
+  useEffect(() => { loadPage() }, [query, sortBy])
 
-  if (loading) return (
+  if (loading && items.length === 0 && !query) return (
     <div className="flex justify-center items-center h-64">
       <div className="animate-spin rounded-full h-12 w-12 border-t-2 border-b-2 border-teal-600"></div>
     </div>
@@ -80,6 +87,8 @@ export default function ProductsPage() {
               id="sort"
               className="w-full md:w-auto px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-teal-500 focus:border-teal-500"
               value={sortBy}
+              disabled={!!query}
+              title={query ? 'Search results are ordered by relevance' : undefined}
               onChange={(e) => setSortBy(e.target.value)}
             >
               <option value="name">Name (A-Z)</option>
@@ -90,7 +99,7 @@ export default function ProductsPage() {
         </div>
       </div>
 
-      {filteredAndSortedItems.length === 0 ? (
+      {items.length === 0 ? (
         <div className="text-center py-12">
           <svg xmlns="http://www.w3.org/2000/svg" className="h-16 w-16 mx-auto text-gray-400" fill="none" viewBox="0 0 24 24" stroke="currentColor">
             <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M9.172 16.172a4 4 0 015.656 0M9 10h.01M15 10h.01M21 12a9 9 0 11-18 0 9 9 0 0118 0z" />
@@ -100,7 +109,7 @@ export default function ProductsPage() {
         </div>
       ) : (
         <div className='grid grid-cols-1 sm:grid-cols-2 md:grid-cols-3 lg:grid-cols-4 gap-6'>
-          {filteredAndSortedItems.map(product => (
+          {items.map(product => (
             <div key={product.id} className='bg-white rounded-xl shadow-sm border border-gray-200 overflow-hidden hover:shadow-md transition-shadow duration-300'>
               <Link to={`/products/${product.id}`} className='block'>
                 <div className='aspect-square overflow-hidden bg-gray-100 relative'>
@@ -153,6 +162,14 @@ export default function ProductsPage() {
           ))}
         </div>
       )}
+
+      {next && (
+        <div className='text-center'>
+          <button className='btn btn-secondary' disabled={loading} onClick={() => loadPage(next)}>
+            {loading ? 'Loading...' : 'Load more'}
+          </button>
+        </div>
+      )}
     </div>
   )
 }
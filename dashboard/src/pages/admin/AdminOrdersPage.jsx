@@ -3,37 +3,45 @@ import { api } from '../../services/api'
 
 export default function AdminOrdersPage() {
   const [orders, setOrders] = useState([])
+  const [stats, setStats] = useState(null)
   const [error, setError] = useState('')
+  const money = (value) => `$ ${Number(value || 0).toFixed(2)}`
 
-  useEffect(() => { api.listOrders().then(setOrders).catch(e => setError(e.message)) }, [])
+  useEffect(() => { api.listOrders().then(page => setOrders(page.results)).catch(e => setError(e.message)) }, [])
+  useEffect(() => { api.dashboardStats().then(setStats).catch(() => {}) }, [])
 
   if (error) return <div className='container'>Error: {error}</div>
 
   return (
     <div className='container space-y-4'>
       <h1 className='text-2xl font-semibold'>Orders</h1>
+      {stats && (
+        <div className='grid gap-4 md:grid-cols-3'>
+          <div className='card'><div className='text-xs text-gray-500'>Products</div><div className='text-xl font-semibold'>{stats.active_products} / {stats.products}</div></div>
+          <div className='card'><div className='text-xs text-gray-500'>Low stock</div><div className='text-xl font-semibold'>{stats.low_stock}</div></div>
+          <div className='card'><div className='text-xs text-gray-500'>Orders today</div><div className='text-xl font-semibold'>{stats.orders_today}</div></div>
+          <div className='card'><div className='text-xs text-gray-500'>Revenue today</div><div className='text-xl font-semibold'>{money(stats.revenue_today)}</div></div>
+          <div className='card'><div className='text-xs text-gray-500'>Revenue 7 days</div><div className='text-xl font-semibold'>{money(stats.revenue_7d)}</div></div>
+          <div className='card'><div className='text-xs text-gray-500'>Revenue 30 days</div><div className='text-xl font-semibold'>{money(stats.revenue_30d)}</div></div>
+        </div>
+      )}
+      {stats && stats.top_sellers.length > 0 && (
+        <div className='card'>
+          <div className='font-medium mb-2'>Top sellers (30 days)</div>
+          {stats.top_sellers.map(p => (
+            <div key={p.product_id} className='flex justify-between text-sm'>
+              <span>{p.name}</span><span>{p.units} sold • {money(p.revenue)}</span>
+            </div>
+          ))}
+        </div>
+      )}
       {orders.map(o => (
         <div key={o.id} className='card'>
           <div className='flex items-center justify-between'>
             <div className='font-medium'>Order #{o.id} • {o.status}</div>
             <div className='text-sm'>$ {Number(o.total_amount).toFixed(2)}</div>
           </div>
-          <div className='text-xs text-gray-500'>Payment: {o.payment_reference || '—'}</div>
-          <div className='mt-3 space-y-2'>
-            {(o.items || []).map(i => (
-              <div key={i.id} className='flex items-center gap-3 text-sm'>
-                <div className='flex items-center gap-3 flex-1'>
-                  {i.product_image_url && (
-                    <img src={i.product_image_url} alt={i.product_name} className='h-10 w-10 rounded object-cover border border-gray-200' />
-                  )}
-                  <div>
-                    <div className='font-medium'>{i.product_name || `Product #${i.product}`}</div>
-                    <div className='text-xs text-gray-500'>$ {Number(i.product_price || i.unit_price || 0).toFixed(2)} × {i.quantity}</div>
-                  </div>
-                </div>
-              </div>
-            ))}
-          </div>
+          <div className='text-xs text-gray-500'>{o.item_count} items • Payment: {o.payment_reference || '—'}</div>
         </div>
       ))}
     </div>
@@ -20,7 +20,7 @@ export default function AdminProductsPage() {
 
   async function load() {
     try {
-      const [prods, cats] = await Promise.all([api.listProducts(), api.listCategories()])
+      const [prods, cats] = await Promise.all([api.listAllProducts(), api.listCategories()])
       setItems(prods); setCategories(cats)
     } catch (e) { setError(e.message) }
   }
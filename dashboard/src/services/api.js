@@ -49,7 +49,30 @@ export const api = {
   updateMe(payload) { return request('/auth/me/', { method: 'PATCH', body: JSON.stringify(payload) }); },
 
   // Products
-  listProducts() { return request('/products/'); },
+  // One page at a time, filtered (category, price_band, in_stock) and sorted (ordering:
+  // name | price | -price) by the server; pass the returned cursor back to fetch the next page.
+  async listProducts(params = {}, cursor) {
+    const query = new URLSearchParams({ ...params, ...(cursor ? { cursor } : {}) }).toString();
+    const data = await request(`/products/${query ? `?${query}` : ''}`);
+    return { results: data.results, cursor: data.next ? new URL(data.next).searchParams.get('cursor') : null };
+  },
+  // Every page of the catalog, for screens that need the whole list.
+  async listAllProducts(params = {}) {
+    const products = [];
+    let cursor = null;
+    do {
+      const page = await this.listProducts({ page_size: 100, ...params }, cursor);
+      products.push(...page.results);
+      cursor = page.cursor;
+    } while (cursor);
+    return products;
+  },
+  // Full-text search, most relevant first; pages are numbered.
+  async searchProducts(q, page) {
+    const query = new URLSearchParams({ q, ...(page ? { page } : {}) }).toString();
+    const data = await request(`/products/search/?${query}`);
+    return { results: data.results, page: data.next ? new URL(data.next).searchParams.get('page') : null };
+  },
   getProduct(id) { return request(`/products/${id}/`); },
   createProduct(payload) { return request('/products/', { method: 'POST', body: JSON.stringify(payload) }); },
   updateProduct(id, payload) { return request(`/products/${id}/`, { method: 'PUT', body: JSON.stringify(payload) }); },
@@ -63,12 +86,21 @@ export const api = {
   addToCart(product, quantity = 1) { return request('/cart/add/', { method: 'POST', body: JSON.stringify({ product, quantity }) }); },
   updateCart(product, quantity) { return request('/cart/update/', { method: 'PATCH', body: JSON.stringify({ product, quantity }) }); },
   removeFromCart(product) { return request('/cart/remove/', { method: 'DELETE', body: JSON.stringify({ product }) }); },
+  // operations: [{ op: 'add' | 'set' | 'remove', product, quantity }]
+  batchCart(operations) { return request('/cart/batch/', { method: 'POST', body: JSON.stringify({ operations }) }); },
 
   // Orders
-  listOrders() { return request('/orders/'); },
+  // Newest first, one page at a time; pass the returned cursor to fetch the next page.
+  async listOrders(cursor) {
+    const data = await request(`/orders/${cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''}`);
+    return { results: data.results, cursor: data.next ? new URL(data.next).searchParams.get('cursor') : null };
+  },
   getOrder(id) { return request(`/orders/${id}/`); },
   placeOrder(payload) { return request('/orders/', { method: 'POST', body: JSON.stringify(payload) }); },
 
+  // Analytics (staff only)
+  dashboardStats() { return request('/analytics/dashboard/'); },
+
   // Utils
   isAdmin() {
     return localStorage.getItem('username') === 'admin';